@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+TYPE_NAMES = {
+    "HMS": "Humsafar", "Mail": "Mail/Express", "SF": "SuperFast", "SHT": "Shatabdi", "DUR": "Duronto",
+    "GRB": "Garib Rath", "JSHT": "Jan Shatabdi", "RJDN": "Rajdhani", "SPL": "Special"
+}
+
+ZONE_NAMES = {
+    "ECOR": "Eastern Coastal Railways",
+    "NR": "Northern Railways",
+    "NCR": "North Central Railways",
+    "NE": "North Eastern Railways",
+    "NWR": "North Western Railways",
+    "WR": "Western Railways",
+    "WCR": "West Central Railways",
+    "CR": "Central Railways",
+    "ECR": "East Central Railways",
+    "ER": "Eastern Railways",
+    "NFR": "Northeast Frontier Railways",
+    "SER": "South Eastern Railways",
+    "SECR": "South East Central Railways",
+    "SR": "Southern Railways",
+    "SCR": "South Central Railways",
+    "SWR": "South Western Railways",
+    "KRCL": "Konkan Rail Zone"
+}
+
+# Buckets used on the overview page, right-closed like the notebook's histogram
+DELAY_BUCKETS = [0, 30, 60, 120, np.inf]
+DELAY_BUCKET_LABELS = ["< 30 min", "30-60 min", "60-120 min", "> 120 min"]
+
+DISTANCE_BANDS = [0, 200, 400, 600, 800, 1000, 1500, 2000, 2500, np.inf]
+DISTANCE_BAND_LABELS = [
+    "0-200 km", "200-400 km", "400-600 km", "600-800 km", "800-1000 km",
+    "1000-1500 km", "1500-2000 km", "2000-2500 km", "2500+ km"
+]
+
+
+STOP_BANDS = [0, 10, 20, 30, 40, np.inf]
+STOP_BAND_LABELS = ["1-10 stops", "11-20 stops", "21-30 stops", "31-40 stops", "40+ stops"]
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class GroupSpec:
+    """One way of grouping trains: by the values of `column`, or by right-closed
+    `bins` over it. A spec without a column puts every train in one group."""
+
+    def __init__(self, name, column=None, bins=None, labels=None):
+        self.name = name
+        self.column = column
+        self.bins = None if bins is None else tuple(bins)
+        self.labels = None if labels is None else tuple(labels)
+
+    def _key(self):
+        return (self.name, self.column, self.bins, self.labels)
+
+    def __eq__(self, other):
+        return isinstance(other, GroupSpec) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def codes(self, data):
+        """(integer code per row, -1 for rows outside every group; group labels)"""
+        if self.column is None:
+            return np.zeros(len(data), dtype=np.int8), pd.Index(["All"])
+        values = data[self.column]
+        if self.bins is not None:
+            labels = self.labels or [f"{lo}-{hi}" for lo, hi in zip(self.bins[:-1], self.bins[1:])]
+            codes = np.searchsorted(self.bins, np.asarray(values, dtype=np.float64), side="left") - 1
+            codes[(codes < 0) | (codes >= len(labels))] = -1
+            return codes, pd.Index(labels)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return np.asarray(values.cat.codes), pd.Index(values.cat.categories)
+        codes, groups = pd.factorize(values, sort=True)
+        return codes, pd.Index(groups)
+
+
+OVERALL = GroupSpec("overall")
+BY_TYPE = GroupSpec("by_type", "TrainType")
+BY_ORIGIN_ZONE = GroupSpec("by_origin_zone", "OriginZone")
+BY_ZONE = GroupSpec("by_zone", "DestinationZone")
+BY_DISTANCE = GroupSpec("by_distance", "MaxDistance", DISTANCE_BANDS, DISTANCE_BAND_LABELS)
+BY_STOPS = GroupSpec("by_stops", "StopCount", STOP_BANDS, STOP_BAND_LABELS)
+DEFAULT_SPECS = (OVERALL, BY_TYPE, BY_ORIGIN_ZONE, BY_ZONE, BY_DISTANCE, BY_STOPS)
+
+
+def _narrow(codes, groups):
+    # Small integer codes let numpy use a radix sort for the stable argsort
+    dtype = np.int16 if groups < 32767 else np.int32
+    return codes.astype(dtype, copy=False)
+
+
+def aggregate(data, specs=DEFAULT_SPECS, delay="DelayOneMonth", quantiles=QUANTILES):
+    """Count, mean, median, `quantiles` and delay-bucket shares of `delay` for
+    every grouping in `specs`.
+
+    The delays are sorted once; each spec then only needs a stable (radix)
+    sort of its group codes to get every group's delays in order, and
+    counts, sums and bucket counts come from bincount.
+    Returns {spec.name: DataFrame indexed by group}.
+    """
+    values = np.asarray(data[delay], dtype=np.float64)
+    valid = np.isfinite(values)
+    order = np.argsort(values, kind="stable")
+    order = order[valid[order]]
+    sorted_values = values[order]
+    buckets = np.searchsorted(DELAY_BUCKETS[1:-1], sorted_values, side="left")
+    nb = len(DELAY_BUCKET_LABELS)
+
+    results = {}
+    for spec in specs:
+        codes, groups = spec.codes(data)
+        codes = _narrow(np.asarray(codes)[order], len(groups))
+        keep = codes >= 0
+        codes, vals, bucket = codes[keep], sorted_values[keep], buckets[keep]
+
+        n = len(groups)
+        count = np.bincount(codes, minlength=n)
+        total = np.bincount(codes, vals, minlength=n)
+        shares = np.bincount(codes.astype(np.int64) * nb + bucket, minlength=n * nb).reshape(n, nb)
+
+        # Within each group the delays stay in ascending order
+        grouped = vals[np.argsort(codes, kind="stable")]
+        start = np.concatenate([[0], np.cumsum(count)[:-1]])
+        out = {"count": count, "mean": np.divide(total, count, out=np.full(n, np.nan), where=count > 0)}
+        for q in quantiles:
+            pos = start + q * np.maximum(count - 1, 0)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, start + np.maximum(count - 1, 0))
+            lo_v = grouped[np.minimum(lo, len(grouped) - 1)] if len(grouped) else np.zeros(n)
+            hi_v = grouped[np.minimum(hi, len(grouped) - 1)] if len(grouped) else np.zeros(n)
+            est = lo_v + (pos - lo) * (hi_v - lo_v)
+            out["median" if q == 0.5 else f"q{round(q * 100)}"] = np.where(count > 0, est, np.nan)
+        for j, label in enumerate(DELAY_BUCKET_LABELS):
+            out[f"share {label}"] = np.divide(shares[:, j], count, out=np.full(n, np.nan), where=count > 0)
+
+        results[spec.name] = pd.DataFrame(out, index=groups)[count > 0]
+    return results
+
+
+_CACHE = {}
+_CACHE_SIZE = 8
+
+
+def aggregate_cached(data, version, specs=DEFAULT_SPECS, delay="DelayOneMonth", quantiles=QUANTILES):
+    """`aggregate`, memoised on the dataset `version` (e.g. the file signature
+    of the dataset it was loaded from)."""
+    key = (version, tuple(specs), delay, tuple(quantiles))
+    if key not in _CACHE:
+        if len(_CACHE) >= _CACHE_SIZE:
+            _CACHE.pop(next(iter(_CACHE)))
+        _CACHE[key] = aggregate(data, specs, delay, quantiles)
+    return _CACHE[key]
+
+
+def summarize(data, delay="DelayOneMonth", version=None):
+    """Everything the dashboard shows about delays, from one aggregation pass."""
+    if version is None:
+        stats = aggregate(data, DEFAULT_SPECS, delay)
+    else:
+        stats = aggregate_cached(data, version, DEFAULT_SPECS, delay)
+    overall = stats["overall"]
+    count = int(overall["count"].iloc[0]) if len(overall) else 0
+    shares = [overall[f"share {label}"].iloc[0] if count else 0.0 for label in DELAY_BUCKET_LABELS]
+
+    return {
+        "trains": count,
+        "mean": float(overall["mean"].iloc[0]) if count else float("nan"),
+        "median": float(overall["median"].iloc[0]) if count else float("nan"),
+        "buckets": pd.DataFrame({"count": np.round(np.array(shares) * count).astype(int), "share": shares},
+                                index=DELAY_BUCKET_LABELS),
+        "by_type": stats["by_type"],
+        "by_zone": stats["by_zone"],
+        "by_distance": stats["by_distance"],
+        "by_stops": stats["by_stops"],
+        "by_origin_zone": stats["by_origin_zone"],
+    }
@@ -1,27 +1,46 @@
 import streamlit as st
+import altair as alt
+import html
 import time
 import pandas as pd
 import numpy as np
 from PIL import Image
-import base64
 
-# Custom function for animated text
+from aggregations import DELAY_BUCKET_LABELS, TYPE_NAMES, ZONE_NAMES
+from assets import (asset_bytes, delay_correlation, delay_distribution, delay_horizons, delay_predictor, read_asset,
+                    train_summary)
+from dataset import DIVISIONS
+from metrics import read_metrics
+from streaming import read_snapshot
+
+# Custom function for animated text. The typing effect runs in the browser:
+# every word is a span revealed by the `typing-reveal` animation after the
+# delay its characters would have taken, so the whole text is sent in one
+# message. It only animates the first time a session sees the text.
 def animated_text(text, speed=0.03):
-    container = st.empty()
-    displayed_text = ""
-    for char in text:
-        displayed_text += char
-        container.markdown(displayed_text)
-        time.sleep(speed)
-    return container
-
-# Function to add background image
-def add_bg_from_url():
-    with open("train_image.jpg", "rb") as image_file:
-        encoded_string = base64.b64encode(image_file.read()).decode()
-
-    st.markdown(
-    f"""
+    text = " ".join(text.split())
+    seen = st.session_state.setdefault("animated_texts", set())
+    if text in seen:
+        return st.markdown(text)
+    seen.add(text)
+
+    spans, offset = [], 0
+    for word in text.split(" "):
+        spans.append(f'<span style="animation-delay: {offset * speed:.2f}s">{html.escape(word)} </span>')
+        offset += len(word) + 1
+    return st.markdown(f'<p class="typing">{"".join(spans)}</p>', unsafe_allow_html=True)
+
+# Function to add background image. The image is served from static/ by
+# Streamlit (server.enableStaticServing in .streamlit/config.toml), so every
+# rerun only sends the style block with its URL; the content hash in the
+# query string makes browsers fetch it again when the file changes.
+def add_bg_from_url(path="static/train_image.jpg"):
+    _, digest = read_asset(path)
+    st.markdown(background_style(f"app/{path}?v={digest[:12]}"), unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def background_style(image_url):
+    return f"""
     <style>
     /* Create a pseudo-element for the background with reduced opacity */
     .stApp:before {{
@@ -31,7 +50,7 @@ def add_bg_from_url():
         left: 0;
         width: 100%;
         height: 100%;
-        background-image: url(data:image/png;base64,{encoded_string});
+        background-image: url({image_url});
         background-attachment: fixed;
         background-size: cover;
         background-position: center;
@@ -89,6 +108,15 @@ def add_bg_from_url():
         text-align: center;
     }}
     
+    @keyframes typing-reveal {{
+        to {{ opacity: 1; }}
+    }}
+
+    .typing span {{
+        opacity: 0;
+        animation: typing-reveal 0s forwards;
+    }}
+
     .stat-number {{
         font-size: 2rem;
         font-weight: bold;
@@ -98,9 +126,68 @@ def add_bg_from_url():
         font-size: 0.9rem;
     }}
     </style>
-    """,
-    unsafe_allow_html=True
-)
+    """
+
+# Mean/median bar chart of a group summary; keeps the row order of `stats`
+def mean_median_chart(stats, label, names=None, horizontal=False):
+    df = stats[["mean", "median"]].rename(columns={"mean": "Mean", "median": "Median"})
+    df.index = [names.get(k, k) if names else k for k in df.index]
+    df = df.reset_index(names=label).melt(id_vars=label, var_name="Statistic", value_name="Delay (minutes)")
+
+    group = alt.X(f"{label}:N", sort=None) if not horizontal else alt.Y(f"{label}:N", sort=None)
+    value = alt.Y("Delay (minutes):Q") if not horizontal else alt.X("Delay (minutes):Q")
+    offset = alt.XOffset("Statistic:N") if not horizontal else alt.YOffset("Statistic:N")
+    chart = alt.Chart(df).mark_bar().encode(
+        group, value, offset,
+        color=alt.Color("Statistic:N", scale=alt.Scale(range=["#3498db", "#e74c3c"])),
+        tooltip=[label, "Statistic", alt.Tooltip("Delay (minutes):Q", format=".1f")],
+    )
+    st.altair_chart(chart, use_container_width=True)
+
+# "a x^5 + b x^4 ... + f" of a np.poly1d, for the regression formula
+def polynomial_text(polynomial):
+    text = " ".join(f"{'-' if coef < 0 else '+'} {abs(coef):.4g}" + ("x" if power else "") + (f"^{power}" if power > 1 else "")
+                    for power, coef in zip(range(polynomial.order, -1, -1), polynomial.coeffs))
+    return text[2:] if text.startswith("+") else "-" + text[2:]
+
+
+# A scrape running with --stream publishes its running statistics; the panel
+# re-reads them every few seconds without rerunning the rest of the page
+LIVE_MAX_AGE = 600
+
+
+def scrape_in_progress():
+    live = read_snapshot()
+    return live is not None and not live["finished"] and time.time() - live["updated_at"] < LIVE_MAX_AGE
+
+
+@st.fragment(run_every="5s")
+def live_panel(delay):
+    live = read_snapshot()
+    if live is None:
+        return
+    st.subheader("🔴 Live Scrape" if not live["finished"] else "Scrape Finished")
+    if delay not in live["delays"]:
+        st.caption(f"The running scrape doesn't collect {delay}; pick one of {', '.join(live['delays'])}.")
+        return
+    overall = live["delays"][delay]["overall"]
+    st.caption(f"Running statistics of {delay} over the {overall['count']:,} trains scraped so far, updated "
+               f"{pd.Timestamp(live['updated_at'], unit='s'):%H:%M:%S} UTC. Quantiles are within 2%.")
+    if not overall["count"]:
+        return
+    col1, col2, col3, col4 = st.columns(4)
+    for col, label, value in [
+        (col1, "Trains", f"{overall['count']:,}"),
+        (col2, "Mean Delay", f"{overall['mean']:.1f} min"),
+        (col3, "Median Delay", f"{overall['median']:.1f} min"),
+        (col4, "90th Percentile", f"{overall['q90']:.1f} min"),
+    ]:
+        with col:
+            st.metric(label, value)
+    by_type = pd.DataFrame(live["delays"][delay]["groups"]["by_type"]).T
+    if len(by_type):
+        mean_median_chart(by_type.sort_values("mean", ascending=False).astype({"mean": float, "median": float}),
+                          "Train Type", TYPE_NAMES)
 
 # Set page title and layout
 st.set_page_config(
@@ -113,6 +200,8 @@ st.set_page_config(
 # Apply background and styling
 add_bg_from_url()
 
+HORIZON_NAMES = {"1m": "past month", "3m": "past 3 months", "6m": "past 6 months", "1y": "past year"}
+
 # Sidebar Navigation with animation
 with st.sidebar:
     st.title("🚆 Navigation")
@@ -123,12 +212,28 @@ with st.sidebar:
         "Train Delay Analysis Overview",
         "Delay across different zones and divisions",
         "Some Statistical Analysis",
+        "Predict My Train",
         "Conclusion"
     ]
+    # Scraper metrics for whoever runs the pipeline; not linked anywhere
+    if st.query_params.get("diagnostics") == "1":
+        sections.append("Diagnostics")
     
     section = st.radio("", sections)
     
     st.sidebar.markdown("---")
+
+    # Every horizon is a column of the same cached dataset, so switching only
+    # swaps which cached summary and model are used
+    horizons = delay_horizons()
+    horizon = "1m"
+    if len(horizons) > 1:
+        horizon = st.selectbox("Delay history", list(horizons), format_func=lambda t: HORIZON_NAMES.get(t, t))
+    delay_column = horizons.get(horizon, "DelayOneMonth")
+
+# Live statistics from the scraped dataset; the sections fall back to the
+# numbers and charts from the original notebook run when it isn't available
+summary = train_summary(delay=delay_column)
 # Main content with background
 st.markdown('<div class="main-content">', unsafe_allow_html=True)
 
@@ -164,9 +269,9 @@ if section == "Introduction":
         """, unsafe_allow_html=True)
     
     with col3:
-        st.markdown("""
+        st.markdown(f"""
         <div class="stat-box">
-            <div class="stat-number">3,100+</div>
+            <div class="stat-number">{f"{summary['trains']:,}" if summary else "3,100+"}</div>
             <div class="stat-label">Trains Analyzed</div>
         </div>
         """, unsafe_allow_html=True)
@@ -248,7 +353,7 @@ elif section == "Source of Data and Structure":
     
     # Create an expandable section for data structure
     with st.expander("See detailed data structure"):
-        st.markdown("""
+        st.markdown(f"""
         Each train's data follows this format:
         
         1. Origin station Code
@@ -259,7 +364,7 @@ elif section == "Source of Data and Structure":
         6. Origin Station Zone
         7. Destination Station Zone
         8. A 1 x 72 sized vector representing divisions and station counts
-        9. Average delay across all stations over past 3 months
+        9. Average delay across all stations over the {HORIZON_NAMES.get(horizon, horizon)}
         """)
         
         # Show a mock dataframe as example
@@ -285,57 +390,72 @@ elif section == "Train Delay Analysis Overview":
     In this section and the next, we present a detailed analysis of train delays with respect to zones and train types.
     """
     animated_text(overview_text, 0.01)
+
+    if scrape_in_progress():
+        live_panel(delay_column)
     
     # Key metrics in boxes
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
+        st.markdown(f"""
         <div class="stat-box" style="background-color: #D32F2F;">
-            <div class="stat-number">47.21</div>
+            <div class="stat-number">{f"{summary['mean']:.2f}" if summary else "47.21"}</div>
             <div class="stat-label">Average Delay (minutes)</div>
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
+        st.markdown(f"""
         <div class="stat-box" style="background-color: #1976D2;">
-            <div class="stat-number">26.53</div>
+            <div class="stat-number">{f"{summary['median']:.2f}" if summary else "26.53"}</div>
             <div class="stat-label">Median Delay (minutes)</div>
         </div>
         """, unsafe_allow_html=True)
     
     # Image with improved styling
     st.subheader("Distribution Of Train Delays")
-    st.image("delay_chart.png")
+    if summary:
+        buckets = summary["buckets"].reset_index(names="Delay")
+        st.altair_chart(alt.Chart(buckets).mark_bar().encode(
+            alt.X("Delay:N", sort=None),
+            alt.Y("count:Q", title="Number of Trains"),
+            color=alt.Color("Delay:N", sort=None, legend=None,
+                            scale=alt.Scale(range=["#2ecc71", "#f1c40f", "#e67e22", "#e74c3c"])),
+            tooltip=["Delay", "count", alt.Tooltip("share:Q", format=".0%")],
+        ), use_container_width=True)
+    else:
+        st.image(asset_bytes("delay_chart.png"))
     
     # Key observations with better formatting
     st.subheader("Key Observations")
     
     observations = [
         {
-            "percentage": "55%",
+            "percentage": "55%", "bucket": DELAY_BUCKET_LABELS[0],
             "description": "of trains are delayed by less than 30 minutes. These mainly include all premium trains like Rajdhani, Duronto and short distance trains with distance covered no more than 500 km.",
             "color": "#4CAF50"
         },
         {
-            "percentage": "23%",
+            "percentage": "23%", "bucket": DELAY_BUCKET_LABELS[1],
             "description": "of trains are delayed by less than 60 minutes. These mainly include all superfast trains and express trains who happen to enjoy the luxury of travelling through low traffic zones.",
             "color": "#2196F3"
         },
         {
-            "percentage": "8%",
+            "percentage": "8%", "bucket": DELAY_BUCKET_LABELS[2],
             "description": "of trains are delayed in range 60-120 minutes.",
             "color": "#FFC107"
         },
         {
-            "percentage": "14%",
+            "percentage": "14%", "bucket": DELAY_BUCKET_LABELS[3],
             "description": "of trains are delayed by more than 120 minutes. This is particularly concerning as this means that a train is more likely to be delayed by more than 2 hours than be late by 1-2 hours. These happen to be long distant trains travelling through high traffic zones or trains who get low priority.",
             "color": "#F44336"
         }
     ]
     
     for obs in observations:
+        if summary:
+            obs["percentage"] = f"{summary['buckets'].loc[obs['bucket'], 'share']:.0%}"
         st.markdown(f"""
         <div style="background-color: {obs['color']}22; border-left: 5px solid {obs['color']}; padding: 1rem; margin: 0.5rem 0; border-radius: 0.3rem;">
             <span style="font-size: 1.5rem; font-weight: bold; color: {obs['color']};">{obs['percentage']}</span> {obs['description']}
@@ -344,7 +464,12 @@ elif section == "Train Delay Analysis Overview":
     
     # Delay by train type analysis
     st.subheader("Delay by Train Type Analysis")
-    st.image("type_delay_chart.png")
+    if summary:
+        by_type = summary["by_type"]
+        order = [t for t in TYPE_NAMES if t in by_type.index] + [t for t in by_type.index if t not in TYPE_NAMES]
+        mean_median_chart(by_type.loc[order], "Train Type", TYPE_NAMES)
+    else:
+        st.image(asset_bytes("type_delay_chart.png"))
     
     # Create toggleable sections for each train type analysis
     train_types = {
@@ -364,7 +489,10 @@ elif section == "Delay across different zones and divisions":
     
     # Zones vs Delay
     st.subheader("Zones vs Delay")
-    st.image("zone_delay_chart.png")
+    if summary:
+        mean_median_chart(summary["by_zone"].sort_values("mean", ascending=False), "Zone", ZONE_NAMES, horizontal=True)
+    else:
+        st.image(asset_bytes("zone_delay_chart.png"))
     
     # Create tabs for different analyses
     tab1, tab2, tab3 = st.tabs(["Zone Analysis", "Distance vs Delay", "Correlation Analysis"])
@@ -373,21 +501,21 @@ elif section == "Delay across different zones and divisions":
         # Zone analysis with better formatting
         zones_analysis = [
             {
-                "zone": "North Central Railways",
+                "zone": "North Central Railways", "code": "NCR",
                 "avg_delay": "75 minutes",
                 "median_delay": "54.1 minutes",
                 "reason": "This is likely because of the high traffic on the route between Delhi and DDU (erstwhile Mughalsarai)",
                 "color": "#C62828"
             },
             {
-                "zone": "East Central Railways",
+                "zone": "East Central Railways", "code": "ECR",
                 "avg_delay": "69.5 minutes",
                 "median_delay": "51.8 minutes",
                 "reason": "This is because of fewer tracks in Bihar's Hajipur-Sonpur-Barauni-Muzzaffarpur-Katihar section and an infamous act by local people namely chain pulling. Chain Pulling annually causes more delay in Bihar than any other state.",
                 "color": "#AD1457"
             },
             {
-                "zone": "Southern Railways",
+                "zone": "Southern Railways", "code": "SR",
                 "avg_delay": "31 minutes",
                 "median_delay": "17.1 minutes",
                 "reason": "Most punctual. This is basically because most of the trains operating in the region have a weekly/bi-weekly frequency so the tracks are not congested much.",
@@ -396,6 +524,10 @@ elif section == "Delay across different zones and divisions":
         ]
         
         for analysis in zones_analysis:
+            if summary and analysis["code"] in summary["by_zone"].index:
+                zone_stats = summary["by_zone"].loc[analysis["code"]]
+                analysis["avg_delay"] = f"{zone_stats['mean']:.1f} minutes"
+                analysis["median_delay"] = f"{zone_stats['median']:.1f} minutes"
             st.markdown(f"""
             <div style="background-color: {analysis['color']}22; border-left: 5px solid {analysis['color']}; padding: 1rem; margin: 1rem 0; border-radius: 0.3rem;">
                 <h4 style="color: {analysis['color']};">{analysis['zone']}</h4>
@@ -407,7 +539,16 @@ elif section == "Delay across different zones and divisions":
     
     with tab2:
         # Delay vs Distance
-        st.image("distance_delay_chart.png")
+        if summary:
+            by_distance = summary["by_distance"].rename(columns={"mean": "Mean Delay (minutes)"})
+            st.altair_chart(alt.Chart(by_distance.reset_index(names="Distance")).mark_bar().encode(
+                alt.X("Distance:N", sort=None),
+                alt.Y("Mean Delay (minutes):Q"),
+                color=alt.Color("Mean Delay (minutes):Q", scale=alt.Scale(scheme="reds"), legend=None),
+                tooltip=["Distance", alt.Tooltip("Mean Delay (minutes):Q", format=".1f"), "count"],
+            ), use_container_width=True)
+        else:
+            st.image(asset_bytes("distance_delay_chart.png"))
         
         st.info("""
         As we see, the delay increases with the distance covered by the train. This is because the longer the train travels, the more
@@ -423,13 +564,24 @@ elif section == "Delay across different zones and divisions":
     with tab3:
         # Correlation analysis
         st.markdown("### Correlation Between Delay and Other Factors")
-        col1, col2 = st.columns(2)
+        correlations = delay_correlation(delay=delay_column)
+        if correlations is not None and len(correlations):
+            corr = correlations.rename_axis("Factor").reset_index(name="Correlation")
+            st.altair_chart(alt.Chart(corr).mark_bar().encode(
+                alt.X("Correlation:Q"),
+                alt.Y("Factor:N", sort=None, title=None),
+                color=alt.Color("Correlation:Q", scale=alt.Scale(scheme="redblue", reverse=True, domainMid=0),
+                                legend=None),
+                tooltip=["Factor", alt.Tooltip("Correlation:Q", format=".3f")],
+            ).properties(height=14 * len(corr)), use_container_width=True)
+        else:
+            col1, col2 = st.columns(2)
 
-        with col1:
-            st.image("delay_correlation_part1.png")
+            with col1:
+                st.image(asset_bytes("delay_correlation_part1.png"))
 
-        with col2:
-            st.image("delay_correlation_part2.png")
+            with col2:
+                st.image(asset_bytes("delay_correlation_part2.png"))
 
         st.markdown("""
         <div style="background-color: #FFFDE7; padding: 1rem; border-radius: 0.5rem; margin: 1rem 0;">
@@ -451,8 +603,19 @@ elif section == "Some Statistical Analysis":
     # Distribution Analysis
     st.subheader("📊 Delay Distribution")
     
+    # Computed from the dataset like the other sections; the notebook's
+    # charts and fit are the fallback
+    distribution = delay_distribution(delay=delay_column)
+    if distribution is not None:
+        pdf, polynomial, r2_score = distribution
+        pdf_chart = alt.Chart(pdf).encode(alt.X("Delay:Q", title="Delay (minutes)"))
+
     # First visualization
-    st.image("delay_distribution.png")
+    if distribution is not None:
+        st.altair_chart(pdf_chart.mark_line(color="#3498db").encode(alt.Y("PDF:Q", title="Probability density")),
+                        use_container_width=True)
+    else:
+        st.image(asset_bytes("delay_distribution.png"))
     st.markdown("""
     #### Raw Probability Density Function
     Let's explore how flight delays distribute across time! This visualization shows the raw probability density function (PDF) 
@@ -462,7 +625,11 @@ elif section == "Some Statistical Analysis":
     """)
     
     # Second visualization
-    st.image("smoothened_distribution.png")
+    if distribution is not None:
+        st.altair_chart(pdf_chart.mark_line(color="#e74c3c").encode(
+            alt.Y("Smoothed:Q", title="Probability density")), use_container_width=True)
+    else:
+        st.image(asset_bytes("smoothened_distribution.png"))
     st.markdown("""
     #### Smoothened Distribution
     To get a clearer picture, we've applied some mathematical magic! Using a Savitzky-Golay filter 
@@ -471,26 +638,92 @@ elif section == "Some Statistical Analysis":
     """)
     
     # Third visualization
-    st.image("regression.png")
-    st.markdown("""
+    formula = "-2.228e-13x^5 + 2.094e-10x^4 - 7.51e-08x^3 + 1.28e-05x^2 - 0.001043x"
+    r2_text = "0.9673"
+    if distribution is not None and polynomial is not None:
+        curve = pd.DataFrame({"Delay": np.linspace(pdf["Delay"].min(), pdf["Delay"].max(), 200)})
+        curve["Fit"] = polynomial(curve["Delay"])
+        st.altair_chart(
+            pdf_chart.mark_circle(color="#3498db").encode(alt.Y("Smoothed:Q", title="Probability density"))
+            + alt.Chart(curve).mark_line(color="red").encode(alt.X("Delay:Q"), alt.Y("Fit:Q")),
+            use_container_width=True)
+        formula = polynomial_text(polynomial)
+        r2_text = f"{r2_score:.4f}"
+    else:
+        st.image(asset_bytes("regression.png"))
+    st.markdown(f"""
     #### Polynomial Regression Analysis
     Here's where it gets interesting! We've fitted a 5th-degree polynomial to our PDF, and the results are impressive.
     
     For the math enthusiasts, the cumulative distribution function can be approximated by:
     
     ```math
-    f(x) = -2.228e-13x^5 + 2.094e-10x^4 - 7.51e-08x^3 + 1.28e-05x^2 - 0.001043x
+    f(x) = {formula}
     ```
     *(Valid for x > 12)*
                 
     ```math
-    R² Score: 0.9673
+    R² Score: {r2_text}
     ```
     *(for x>12)*
     
     This mathematical model helps us predict and understand delay patterns with remarkable accuracy! 
     """)
 
+elif section == "Predict My Train":
+    st.title("🔮 Predict My Train")
+
+    # Trained once per dataset version and shared by every session
+    predictor = delay_predictor(delay=delay_column)
+
+    if predictor is None:
+        st.info("Predictions need the scraped dataset (train_data.csv). Run scraper.py to collect it.")
+    else:
+        tab1, tab2 = st.tabs(["By Train Number", "By Route"])
+
+        with tab1:
+            if predictor.predictions is None:
+                st.info("This dataset has no train numbers. Re-run scraper.py to add them, or use the route tab.")
+            else:
+                numbers = st.text_input("Train numbers (comma separated)", placeholder="12301, 12951")
+                trainNos = [t.strip() for t in numbers.split(",") if t.strip()]
+                if trainNos:
+                    predicted = predictor.predict_trains(trainNos)
+                    st.dataframe(pd.DataFrame({
+                        "Train": trainNos,
+                        "Predicted Delay (min)": [round(predicted[t], 1) if t in predicted else None for t in trainNos],
+                    }), use_container_width=True, hide_index=True)
+                    unknown = [t for t in trainNos if t not in predicted]
+                    if unknown:
+                        st.warning(f"Not in the dataset: {', '.join(unknown)}")
+
+        with tab2:
+            categories = predictor.model.pipeline.categories
+            with st.form("predict_route"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    train_type = st.selectbox("Train type", categories["TrainType"],
+                                              format_func=lambda t: TYPE_NAMES.get(t, t))
+                    origin_zone = st.selectbox("Origin zone", categories["OriginZone"])
+                    destination_zone = st.selectbox("Destination zone", categories["DestinationZone"])
+                with col2:
+                    stops = st.number_input("Number of stoppages", min_value=2, max_value=200, value=20)
+                    distance = st.number_input("Distance (km)", min_value=10, max_value=5000, value=1000, step=50)
+                    divisions = st.multiselect("Divisions on the route", DIVISIONS)
+                submitted = st.form_submit_button("Predict delay")
+
+            if submitted:
+                row = {"StopCount": stops, "MaxDistance": distance, "TrainType": train_type,
+                       "OriginZone": origin_zone, "DestinationZone": destination_zone}
+                # Spread the stops evenly over the chosen divisions
+                row.update({d: stops / len(divisions) for d in divisions})
+                delay = predictor.predict(pd.DataFrame([row]))[0]
+                st.markdown(f"""
+                <div class="stat-box" style="background-color: #6A1B9A;">
+                    <div class="stat-number">{delay:.1f}</div>
+                    <div class="stat-label">Predicted Average Delay (minutes)</div>
+                </div>
+                """, unsafe_allow_html=True)
 
 elif section == "Conclusion":
     st.title("📌 Conclusion")
@@ -545,5 +778,49 @@ elif section == "Conclusion":
     </div>
     """, unsafe_allow_html=True)
 
+elif section == "Diagnostics":
+    st.title("🩺 Scraper Diagnostics")
+
+    snapshot = read_metrics()
+    if snapshot is None:
+        st.info("No metrics yet. scraper.py writes scrape_metrics.json while it runs.")
+    else:
+        counters = snapshot["counters"]
+        st.caption(f"Last updated {pd.Timestamp(snapshot['updated_at'], unit='s'):%Y-%m-%d %H:%M:%S} UTC")
+        st.button("Refresh")
+
+        col1, col2, col3, col4 = st.columns(4)
+        for col, label, value in [
+            (col1, "Trains", f"{counters.get('trains', 0):,}"),
+            (col2, "Trains / sec", f"{counters.get('trains_per_sec', 0):.2f}"),
+            (col3, "Requests", f"{counters.get('requests', 0):,}"),
+            (col4, "Failed Trains", f"{counters.get('errors', 0):,}"),
+        ]:
+            with col:
+                st.metric(label, value)
+
+        st.subheader("Stage Latency")
+        # No stages yet after a run with nothing to do (e.g. --resume with every train done)
+        stages = pd.DataFrame(snapshot["stages"]).T.drop(columns="buckets", errors="ignore")
+        st.dataframe(stages.astype(float).round(1), use_container_width=True)
+        if "total_s" in stages and stages["total_s"].notna().any():
+            chart = alt.Chart(stages.reset_index(names="Stage")).mark_bar(color="#3498db").encode(
+                alt.X("total_s:Q", title="Total time (s)"), alt.Y("Stage:N", sort="-x"),
+                tooltip=["Stage", alt.Tooltip("total_s:Q", format=".2f"), "calls"],
+            )
+            st.altair_chart(chart, use_container_width=True)
+
+        st.subheader("Errors")
+        errors = [{"Stage": stage, "Error": kind, "Count": n}
+                  for stage, kinds in snapshot["errors"].items() for kind, n in kinds.items()]
+        if errors:
+            st.dataframe(pd.DataFrame(errors).sort_values("Count", ascending=False),
+                         use_container_width=True, hide_index=True)
+        else:
+            st.success("No errors recorded.")
+
+        with st.expander("All counters"):
+            st.json(counters)
+
 # Close the main content div
 st.markdown('</div>', unsafe_allow_html=True)
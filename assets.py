@@ -0,0 +1,122 @@
+import hashlib
+import os
+
+import streamlit as st
+
+from aggregations import summarize
+from attribution import delay_correlations
+from dataset import MANIFEST, bundle_path, load_dataset
+from distribution import pdf_fit
+from prediction import DelayModel, PredictionService
+from schema import HORIZON_COLUMNS
+
+# Everything here is cached with st.cache_resource, so there is one copy per
+# server process shared by all sessions. Files are keyed by (mtime, size):
+# a changed file is re-read on the next rerun, and anything derived from its
+# content is keyed by the content hash so an unchanged re-save costs nothing.
+
+
+def file_signature(path):
+    st_ = os.stat(path)
+    return st_.st_mtime_ns, st_.st_size
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _read(path, signature):
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def read_asset(path):
+    """(bytes, sha256) of a static file."""
+    return _read(path, file_signature(path))
+
+
+def asset_bytes(path):
+    return read_asset(path)[0]
+
+
+def dataset_signature(csv_path):
+    if os.path.exists(csv_path):
+        return file_signature(csv_path)
+    manifest = os.path.join(bundle_path(csv_path), MANIFEST)
+    if os.path.exists(manifest):
+        return file_signature(manifest)
+    return None
+
+
+@st.cache_resource(show_spinner="Loading train data...", max_entries=4)
+def _dataset(csv_path, signature, columns):
+    return load_dataset(csv_path, columns)
+
+
+def load_train_data(csv_path="train_data.csv", columns=None):
+    """The scraped dataset, or None when neither the CSV nor its bundle exists."""
+    signature = dataset_signature(csv_path)
+    if signature is None:
+        return None
+    return _dataset(csv_path, signature, tuple(columns) if columns else None)
+
+
+def delay_horizons(csv_path="train_data.csv"):
+    """{timeline: delay column} for the history windows the dataset has."""
+    data = load_train_data(csv_path)
+    if data is None:
+        return {}
+    return {t: c for t, c in HORIZON_COLUMNS.items() if c in data.columns}
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _summary(csv_path, signature, delay, _data):
+    return summarize(_data, delay, version=(csv_path, signature))
+
+
+def train_summary(csv_path="train_data.csv", delay="DelayOneMonth"):
+    """Cached delay summary of the dataset, recomputed only when the data changes."""
+    data = load_train_data(csv_path)
+    if data is None:
+        return None
+    return _summary(csv_path, dataset_signature(csv_path), delay, data)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _correlations(csv_path, signature, delay, _data):
+    # The other horizons are the same delays over another window, and TrainNo is an id
+    other = [c for c in HORIZON_COLUMNS.values() if c != delay] + ["TrainNo"]
+    data = _data.drop(columns=other, errors="ignore").dropna(subset=[delay])
+    return delay_correlations(data, delay).dropna().sort_values(ascending=False)
+
+
+def delay_correlation(csv_path="train_data.csv", delay="DelayOneMonth"):
+    """Correlation of every numeric column with the delay, strongest first."""
+    data = load_train_data(csv_path)
+    if data is None:
+        return None
+    return _correlations(csv_path, dataset_signature(csv_path), delay, data)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _distribution(csv_path, signature, delay, _data):
+    return pdf_fit(_data[delay])
+
+
+def delay_distribution(csv_path="train_data.csv", delay="DelayOneMonth"):
+    """(binned and smoothed PDF, fitted polynomial, R^2) of the delays."""
+    data = load_train_data(csv_path)
+    if data is None:
+        return None
+    return _distribution(csv_path, dataset_signature(csv_path), delay, data)
+
+
+@st.cache_resource(show_spinner="Training delay model...", max_entries=4)
+def _predictor(csv_path, signature, delay, _data):
+    return PredictionService(DelayModel().fit(_data, delay), _data)
+
+
+def delay_predictor(csv_path="train_data.csv", delay="DelayOneMonth"):
+    """Prediction service trained once per dataset version and shared by all sessions."""
+    data = load_train_data(csv_path)
+    if data is None:
+        return None
+    return _predictor(csv_path, dataset_signature(csv_path), delay, data)
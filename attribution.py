@@ -0,0 +1,149 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from dataset import DIVISIONS, load_dataset
+
+# Which divisions does delay accumulate in? Each train is a row of the
+# (n, 72) division count matrix, which is mostly zeros, so it is kept as a
+# CSR matrix and every fit works on the small k x k Gram matrix X'WX
+# instead of on centred dense copies of X. Matrices denser than
+# DENSE_THRESHOLD are multiplied as dense arrays, where BLAS is faster.
+
+DENSE_THRESHOLD = 0.1
+
+
+def delay_correlations(data, delay="DelayOneMonth"):
+    """Pearson correlation of every numeric column with `delay` (one column of
+    data.corr(), without computing the rest of the matrix)."""
+    numeric = data.select_dtypes("number")
+    X = numeric.drop(columns=[delay]).to_numpy(dtype=np.float64)
+    y = numeric[delay].to_numpy(dtype=np.float64)
+    Xc, yc = X - X.mean(axis=0), y - y.mean()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = (Xc.T @ yc) / (np.sqrt((Xc ** 2).sum(axis=0)) * np.sqrt((yc ** 2).sum()))
+    return pd.Series(corr, index=numeric.columns.drop(delay), name=delay)
+
+
+def design_matrix(data, controls=("MaxDistance",)):
+    """(sparse X, column names): division counts plus `controls`, dropping
+    divisions no train passes through."""
+    divisions = [c for c in DIVISIONS if c in data.columns]
+    counts = sparse.csr_matrix(data[divisions].to_numpy(dtype=np.float64))
+    used = np.flatnonzero(counts.getnnz(axis=0))
+    columns = [divisions[i] for i in used] + list(controls)
+    parts = [counts[:, used]] + [sparse.csr_matrix(data[[c]].to_numpy(dtype=np.float64)) for c in controls]
+    X = sparse.hstack(parts, format="csr")
+    if X.nnz > DENSE_THRESHOLD * X.shape[0] * X.shape[1]:
+        X = X.toarray()
+    return X, columns
+
+
+def _moments(X, y, w):
+    # Weighted, centred Gram matrix and cross products without centring X itself
+    W = w.sum()
+    if sparse.issparse(X):
+        gram = (X.T @ (sparse.diags(w) @ X)).toarray()
+    else:
+        gram = X.T @ (w[:, None] * X)
+    mx = (w @ X) / W
+    my = (w @ y) / W
+    gram = gram - W * np.outer(mx, mx)
+    xy = (w * y) @ X - W * mx * my
+    yy = w @ (y * y) - W * my * my
+    return gram, xy, yy
+
+
+def _ridge(gram, xy, alpha):
+    # Standardised coefficients, reported per unit of the original column
+    scale = np.sqrt(np.maximum(np.diag(gram), 1e-12))
+    corr = gram / np.outer(scale, scale)
+    beta = np.linalg.solve(corr + alpha * np.eye(len(scale)), xy / scale)
+    return beta / scale
+
+
+def fit_ridge(X, y, alpha=1.0, weights=None):
+    """Ridge coefficients of y on X (with intercept), in minutes of delay per
+    station in the division / per unit of each control."""
+    w = np.ones(X.shape[0]) if weights is None else weights
+    gram, xy, _ = _moments(X, y, w)
+    return _ridge(gram, xy, alpha)
+
+
+def partial_correlations(X, y, ridge=1e-6):
+    """Correlation of each column with y after controlling for all other columns."""
+    gram, xy, yy = _moments(X, y, np.ones(X.shape[0]))
+    full = np.block([[gram, xy[:, None]], [xy[None, :], np.array([[yy]])]])
+    scale = np.sqrt(np.maximum(np.diag(full), 1e-12))
+    precision = np.linalg.inv(full / np.outer(scale, scale) + ridge * np.eye(len(full)))
+    return -precision[:-1, -1] / np.sqrt(precision[:-1, :-1].diagonal() * precision[-1, -1])
+
+
+def _bootstrap_chunk(X, y, alpha, n_boot, seed):
+    # Poisson(1) weights approximate resampling with replacement and need no index arrays
+    rng = np.random.default_rng(seed)
+    return np.array([fit_ridge(X, y, alpha, rng.poisson(1.0, X.shape[0]).astype(np.float64))
+                     for _ in range(n_boot)])
+
+
+def bootstrap(X, y, alpha=1.0, n_boot=500, workers=None, seed=0):
+    """(n_boot, k) bootstrap replicates of the ridge coefficients, spread
+    across a process pool in equal chunks."""
+    workers = workers or os.cpu_count() or 1
+    chunks = [len(c) for c in np.array_split(np.arange(n_boot), workers) if len(c)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    if len(chunks) == 1:
+        return _bootstrap_chunk(X, y, alpha, chunks[0], seeds[0])
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        parts = pool.map(_bootstrap_chunk, [X] * len(chunks), [y] * len(chunks), [alpha] * len(chunks),
+                         chunks, seeds)
+        return np.vstack(list(parts))
+
+
+def rank_divisions(data, delay="DelayOneMonth", alpha=1.0, n_boot=500, confidence=0.95, workers=None,
+                   controls=("MaxDistance",), seed=0):
+    """Divisions ranked by their ridge coefficient on delay, with bootstrap
+    confidence intervals, partial and raw correlations and train counts."""
+    data = data[np.isfinite(np.asarray(data[delay], dtype=np.float64))]
+    X, columns = design_matrix(data, controls)
+    y = data[delay].to_numpy(dtype=np.float64)
+
+    coef = fit_ridge(X, y, alpha)
+    replicates = bootstrap(X, y, alpha, n_boot, workers, seed) if n_boot else np.full((1, len(columns)), np.nan)
+    tail = (1 - confidence) / 2
+    raw = delay_correlations(data[columns + [delay]], delay)
+
+    result = pd.DataFrame({
+        "coef": coef,
+        "ci_low": np.quantile(replicates, tail, axis=0),
+        "ci_high": np.quantile(replicates, 1 - tail, axis=0),
+        "partial_corr": partial_correlations(X, y),
+        "corr": raw.reindex(columns).to_numpy(),
+        "trains": X.getnnz(axis=0) if sparse.issparse(X) else np.count_nonzero(X, axis=0),
+    }, index=pd.Index(columns, name="Division"))
+    return result.drop(index=list(controls)).sort_values("coef", ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank divisions by their contribution to train delay")
+    parser.add_argument("csv", nargs="?", default="train_data.csv")
+    parser.add_argument("--delay", default="DelayOneMonth")
+    parser.add_argument("--alpha", type=float, default=1.0, help="ridge penalty on standardised columns")
+    parser.add_argument("--boot", type=int, default=500, help="bootstrap resamples")
+    parser.add_argument("--workers", type=int, help="bootstrap processes (default: all CPUs)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ranking = rank_divisions(load_dataset(args.csv), args.delay, args.alpha, args.boot, workers=args.workers)
+    print(ranking.head(args.top).round(3).to_string())
+    print(f"\nRanked {len(ranking)} divisions in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+import pandas as pd
+
+from parse_backends import BACKENDS, parse_page
+
+# Parsing throughput of every installed parser backend over pages saved with
+# `scraper.py --save-pages DIR`. Run from the repository root:
+#
+#   python -m benchmarks.parse_bench DIR --workers 4
+
+
+def page_kind(filename):
+    path = unquote(filename)
+    if path.startswith("/list/"):
+        return "listing"
+    if "/history" in path:
+        return "history"
+    if path.startswith("/train-enquiry/"):
+        return "route"
+    return None
+
+
+def load_pages(directory):
+    pages = {}
+    for name in sorted(os.listdir(directory)):
+        kind = page_kind(name)
+        if kind is not None:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                pages.setdefault(kind, []).append(f.read())
+    return pages
+
+
+def bench(backend, kind, pages, repeat=3):
+    """(best pages/sec over `repeat` runs, parsed results)"""
+    best = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [parse_page(backend, kind, html) for html in pages]
+        best = max(best, len(pages) / (time.perf_counter() - started))
+    return best, results
+
+
+def bench_pool(backend, kind, pages, workers):
+    with ProcessPoolExecutor(workers) as pool:
+        list(pool.map(parse_page, [backend] * workers, [kind] * workers, pages[:workers]))  # warm up
+        started = time.perf_counter()
+        list(pool.map(parse_page, [backend] * len(pages), [kind] * len(pages), pages,
+                      chunksize=max(1, len(pages) // (workers * 4))))
+        return len(pages) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML parser backends on saved pages")
+    parser.add_argument("directory", nargs="?", default="pages", help="pages saved with scraper.py --save-pages")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated backends to compare")
+    parser.add_argument("--workers", type=int, default=0, help="also measure a process pool of this size")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args.directory)
+    rows = []
+    for kind, htmls in pages.items():
+        _, reference = bench("bs4", kind, htmls, 1)
+        for backend in args.backends.split(","):
+            rate, results = bench(backend, kind, htmls, args.repeat)
+            row = {"kind": kind, "backend": backend, "pages": len(htmls), "pages/sec": rate,
+                   "agrees with bs4": results == reference}
+            if args.workers:
+                row[f"pages/sec ({args.workers} processes)"] = bench_pool(backend, kind, htmls, args.workers)
+            rows.append(row)
+
+    table = pd.DataFrame(rows).set_index(["kind", "backend"])
+    table["speedup"] = table["pages/sec"] / table.xs("bs4", level="backend")["pages/sec"].reindex(
+        table.index.get_level_values("kind")).to_numpy()
+    print(table.round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
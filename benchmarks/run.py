@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from benchmarks.synthetic import make_pages, write_csv
+
+# Timing harness for the data paths: scraping (against stub_server.py),
+# parsing, loading, aggregation, distributions, correlations, the model and
+# the dashboard. Every stage runs in a fresh process, so its peak RSS is its
+# own, on synthetic data of each requested size. Run from the repository root:
+#
+#   python -m benchmarks.run --rows 3200,100000 --save-baseline
+#   python -m benchmarks.run --rows 3200,100000          # compare with it
+#
+# A stage is a regression when it is more than --tolerance slower than the
+# baseline (and slower by more than NOISE_SECONDS); the run then exits with 1.
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+NOISE_SECONDS = 0.05
+STAGES = {}
+
+
+def stage(name, unit="rows", sized=True):
+    """Register `setup(ctx) -> (work, items)`; only work() is timed. Stages
+    that aren't `sized` run once, not once per dataset size."""
+    def register(setup):
+        STAGES[name] = (setup, unit, sized)
+        return setup
+    return register
+
+
+@stage("read_csv")
+def _read_csv(ctx):
+    from dataset import read_csv
+    return lambda: read_csv(ctx["csv"]), ctx["rows"]
+
+
+@stage("bundle_build")
+def _bundle_build(ctx):
+    from dataset import build_bundle
+    return lambda: build_bundle(ctx["csv"], ctx["bundle"]), ctx["rows"]
+
+
+@stage("bundle_load")
+def _bundle_load(ctx):
+    from dataset import load_bundle
+    return lambda: np.asarray(load_bundle(ctx["bundle"])["DelayOneMonth"]).sum(), ctx["rows"]
+
+
+@stage("summarize")
+def _summarize(ctx):
+    from aggregations import summarize
+    from dataset import load_bundle
+    data = load_bundle(ctx["bundle"])
+    return lambda: summarize(data), ctx["rows"]
+
+
+@stage("corr_full")
+def _corr_full(ctx):
+    # The notebook's heatmap: the full numeric correlation matrix
+    from dataset import load_bundle
+    data = load_bundle(ctx["bundle"])
+    return lambda: data.select_dtypes("number").corr(), ctx["rows"]
+
+
+@stage("corr_delay")
+def _corr_delay(ctx):
+    from attribution import delay_correlations
+    from dataset import load_bundle
+    data = load_bundle(ctx["bundle"])
+    return lambda: delay_correlations(data), ctx["rows"]
+
+
+@stage("distribution")
+def _distribution(ctx):
+    from dataset import load_bundle
+    from distribution import binned_pdf, grouped_pdf, kde
+    data = load_bundle(ctx["bundle"], ["TrainType", "DelayOneMonth"])
+    delay = np.asarray(data["DelayOneMonth"], dtype=np.float64)
+
+    def work():
+        binned_pdf(delay)
+        grouped_pdf(delay, np.asarray(data["TrainType"].cat.codes))
+        kde(delay)
+    return work, ctx["rows"]
+
+
+@stage("model_fit")
+def _model_fit(ctx):
+    from dataset import load_bundle
+    from prediction import DelayModel
+    data = load_bundle(ctx["bundle"])
+    return lambda: DelayModel().fit(data), ctx["rows"]
+
+
+@stage("model_predict")
+def _model_predict(ctx):
+    from dataset import load_bundle
+    from prediction import DelayModel
+    data = load_bundle(ctx["bundle"])
+    model = DelayModel().fit(data)
+    return lambda: model.predict(data), ctx["rows"]
+
+
+@stage("parse", unit="pages", sized=False)
+def _parse(ctx):
+    from benchmarks.parse_bench import load_pages
+    from parse_backends import DEFAULT_BACKEND, parse_page
+    pages = [(kind, html) for kind, htmls in load_pages(ctx["pages"]).items() for html in htmls]
+    return lambda: [parse_page(DEFAULT_BACKEND, kind, html) for kind, html in pages], len(pages)
+
+
+@stage("scrape", unit="trains", sized=False)
+def _scrape(ctx):
+    from scraper import ScrapeEngine
+    from stub_server import serve
+    _, url = serve(ctx["pages"])
+
+    async def run():
+        engine = ScrapeEngine(url, url, host_rate=0, render_fallback=False)
+        try:
+            return await engine.run(range(1, ctx["listing_pages"] + 1), lambda *result: None)
+        finally:
+            await engine.close()
+    return lambda: asyncio.run(run()), ctx["trains"]
+
+
+@stage("render_first", unit="runs")
+def _render_first(ctx):
+    at = _app_test(ctx)
+    return lambda: at.run(), 1
+
+
+@stage("render_sections", unit="sections")
+def _render_sections(ctx):
+    # Switching sections after the first run, when the caches are warm
+    at = _app_test(ctx)
+    at.run()
+    sections = at.sidebar.radio[0].options
+
+    def work():
+        for section in sections:
+            at.sidebar.radio[0].set_value(section).run()
+    return work, len(sections)
+
+
+def _app_test(ctx):
+    # The app reads train_data.csv and its images from the working directory
+    from streamlit.testing.v1 import AppTest
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp(dir=ctx["workdir"])
+    for name in os.listdir(root):
+        if not name.startswith(".") and not name.startswith("train_data"):
+            os.symlink(os.path.join(root, name), os.path.join(workdir, name))
+    shutil.copy(ctx["csv"], os.path.join(workdir, "train_data.csv"))
+    os.chdir(workdir)
+    return AppTest.from_file(os.path.join(workdir, "app.py"), default_timeout=600)
+
+
+def _run_stage(name, ctx):
+    setup, unit, _ = STAGES[name]
+    work, items = setup(ctx)
+    started = time.perf_counter()
+    work()
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "items": items, "unit": unit, "throughput": items / seconds if seconds else None,
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def peak_rss_mb():
+    # On Linux ru_maxrss survives exec, so a spawned child would report its
+    # parent's peak; VmHWM belongs to the process's own address space
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def run_stage(name, ctx):
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_run_stage, name, ctx).result()
+
+
+def compare(results, baseline, tolerance):
+    """Keys of the results that got slower than the baseline allows."""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        result["baseline_seconds"] = before["seconds"]
+        result["change"] = result["seconds"] / before["seconds"] - 1 if before["seconds"] else None
+        if result["seconds"] > before["seconds"] * (1 + tolerance) + NOISE_SECONDS:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrape, parse, load, aggregate and render paths")
+    parser.add_argument("--rows", default="3200,100000", help="comma-separated synthetic dataset sizes")
+    parser.add_argument("--trains", type=int, default=300, help="trains in the fixture pages for parse/scrape")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stages = args.stages.split(",")
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)} (available: {', '.join(STAGES)})")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        pages = os.path.join(workdir, "pages")
+        ctx = {"workdir": workdir, "pages": pages, "trains": args.trains,
+               "listing_pages": make_pages(pages, args.trains, seed=args.seed)}
+
+        for rows in [int(r) for r in args.rows.split(",")]:
+            csv = write_csv(rows, os.path.join(workdir, f"train_data_{rows}.csv"), args.seed)
+            ctx.update(rows=rows, csv=csv, bundle=os.path.join(workdir, f"train_data_{rows}.bundle"))
+            run_stage("bundle_build", ctx)  # so stages that read the bundle can start from it
+            for name in stages:
+                key = f"{name}@{rows}" if STAGES[name][2] else name
+                if key in results:
+                    continue
+                r = results[key] = run_stage(name, ctx)
+                print(f"{key:<28} {r['seconds']:9.3f}s {r['throughput'] or 0:14,.0f} {r['unit']}/s "
+                      f"{r['peak_rss_mb']:9.0f} MB peak", flush=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for key in regressions:
+        r = results[key]
+        print(f"REGRESSION {key}: {r['seconds']:.3f}s vs {r['baseline_seconds']:.3f}s baseline "
+              f"({100 * r['change']:+.0f}%)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif baseline:
+        print(f"{len(regressions)} regressions against {args.baseline}")
+    sys.exit(1 if regressions and not args.save_baseline else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import argparse
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from aggregations import TYPE_NAMES, ZONE_NAMES
+from dataset import DIVISIONS
+from schema import COLUMNS
+from scraper import page_filename
+
+# Synthetic stand-ins for the scraped data: train_data.csv-shaped frames of
+# any size, and etrain/erail pages that stub_server.py can serve and every
+# parser backend understands. Everything is derived from the seed, so runs
+# are reproducible.
+
+TYPE_WEIGHTS = np.array([1, 10, 8, 1, 1, 1, 1, 1, 3], dtype=np.float64)
+ZONES = list(ZONE_NAMES)
+MAX_DIVISIONS = 8
+
+
+def _station_codes(rng, n):
+    letters = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    codes = {"".join(rng.choice(letters, rng.integers(2, 5))) for _ in range(n * 2)}
+    return sorted(codes)[:n]
+
+
+def make_dataset(n, seed=0, stations=400):
+    """n trains in the train_data.csv schema. Delays depend on distance,
+    train type and a per-division effect, with heavy-tailed noise."""
+    rng = np.random.default_rng(seed)
+    codes = np.array(_station_codes(rng, stations))
+    division_zone = rng.choice(ZONES, len(DIVISIONS))
+    division_effect = rng.gamma(1.5, 0.6, len(DIVISIONS))
+    type_effect = dict(zip(TYPE_NAMES, rng.normal(0, 8, len(TYPE_NAMES))))
+
+    stops = np.clip(np.round(rng.lognormal(3.0, 0.6, n)), 2, 150).astype(np.int64)
+    distance = np.round(stops * rng.uniform(20, 60, n)).astype(np.int64)
+    train_type = rng.choice(list(TYPE_NAMES), n, p=TYPE_WEIGHTS / TYPE_WEIGHTS.sum())
+
+    # Each route crosses a run of up to MAX_DIVISIONS divisions; stops are
+    # split between them at random
+    spans = rng.integers(1, MAX_DIVISIONS + 1, n)
+    start = rng.integers(0, len(DIVISIONS), n)
+    stride = rng.integers(1, 5, n)
+    weights = rng.random((n, MAX_DIVISIONS)) * (np.arange(MAX_DIVISIONS) < spans[:, None])
+    shares = np.floor(weights / weights.sum(axis=1, keepdims=True) * stops[:, None]).astype(np.int64)
+    shares[:, 0] += stops - shares.sum(axis=1)
+    columns = (start[:, None] + stride[:, None] * np.arange(MAX_DIVISIONS)) % len(DIVISIONS)
+    matrix = np.zeros((n, len(DIVISIONS)), dtype=np.int64)
+    np.add.at(matrix, (np.repeat(np.arange(n), MAX_DIVISIONS), columns.ravel()), shares.ravel())
+
+    delay = (0.01 * distance + matrix @ division_effect + np.vectorize(type_effect.get)(train_type)
+             + rng.lognormal(2.5, 1.0, n))
+    last = columns[np.arange(n), spans - 1]
+
+    df = pd.DataFrame({
+        "Origin": rng.choice(codes, n),
+        "Destination": rng.choice(codes, n),
+        "StopCount": stops,
+        "MaxDistance": distance,
+        "TrainType": train_type,
+        "OriginZone": division_zone[start],
+        "DestinationZone": division_zone[last],
+    })
+    df = pd.concat([df, pd.DataFrame(matrix, columns=DIVISIONS)], axis=1)
+    df["DelayOneMonth"] = np.round(np.maximum(delay, 0), 2)
+    return df[COLUMNS]
+
+
+def write_csv(n, path, seed=0):
+    make_dataset(n, seed).to_csv(path, index=False)
+    return path
+
+
+def _padding(links):
+    # Navigation boilerplate so pages weigh roughly what the real ones do
+    items = "".join(f'<li><a href="/page/{i}">Link {i}</a></li>' for i in range(links))
+    return f'<div class="nav"><ul>{items}</ul></div>'
+
+
+def _page(body, padding):
+    return f"<html><head><title>Train</title></head><body>{padding}{body}{padding}</body></html>"
+
+
+def _delay_text(minutes):
+    if minutes <= 0:
+        return "Right Time"
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours} H {minutes} M" if hours else f"{minutes} M"
+
+
+def make_pages(directory, trains=300, timelines=("1m",), per_page=50, days=30, seed=0, links=300):
+    """Write listing, history and route pages for `trains` trains into
+    `directory`, named like `scraper.py --save-pages` names them. Returns
+    the number of listing pages."""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    padding = _padding(links)
+    codes = _station_codes(rng, 400)
+    today = date(2024, 6, 30)
+
+    def write(path, body):
+        with open(os.path.join(directory, page_filename(path)), "w", encoding="utf-8") as f:
+            f.write(_page(body, padding))
+
+    pages = (trains + per_page - 1) // per_page
+    for page in range(pages):
+        numbers = range(10000 + page * per_page, 10000 + min(trains, (page + 1) * per_page))
+        rows = "".join(f'<tr><td><a href="/train/{no}">{no}</a></td><td><a>SYNTHETIC EXPRESS {no}</a></td>'
+                       f"<td>GRB</td></tr>" for no in numbers)
+        write(f"/list/GRB-TRAINS?page={page + 1}", f'<table class="trainlist">{rows}</table>')
+
+        for no in numbers:
+            stops = int(rng.integers(3, 40))
+            stations = rng.choice(codes, stops, replace=False)
+            divisions = rng.choice(DIVISIONS, stops)
+            zones = rng.choice(ZONES, stops)
+            distance = np.cumsum(rng.integers(10, 120, stops)) - 10
+            route = "".join(
+                f'<tr><td>{k + 1}</td><td>{stations[k]}</td>'
+                f'<td><span title="Station={stations[k]},Zone={zones[k]},Division={divisions[k]}">'
+                f'{stations[k]}</span></td>' + "<td>--</td>" * 6 + f"<td>{distance[k]}</td></tr>"
+                for k in range(stops))
+            write(f"/train-enquiry/{no}", f'<table class="DataTable RouteList">{route}</table>')
+
+            for timeline in timelines:
+                delays = np.maximum(rng.normal(30, 40, (stops, days)), 0)
+                header = "<tr><th>Station</th>" + "".join(
+                    f"<th>{(today - timedelta(days=d)):%d %b}</th>" for d in range(days)) + "</tr>"
+                body = "".join(
+                    f"<tr><td>Station {stations[k]} ({stations[k]})</td>"
+                    + "".join(f"<td>{_delay_text(m)}</td>" for m in delays[k]) + "</tr>"
+                    for k in range(stops))
+                averages = "".join(f'<div class="inlineblock pdl5">Avg. Delay: {int(m)} Min\'s</div>'
+                                   for m in delays.mean(axis=1))
+                write(f"/train/Synthetic-Express-{no}-{no}/history?d={timeline}",
+                      f"{averages}<table>{header}{body}</table>")
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset or fixture pages")
+    parser.add_argument("--rows", type=int, help="write a synthetic train_data.csv with this many trains")
+    parser.add_argument("--output", default="synthetic_train_data.csv")
+    parser.add_argument("--pages", metavar="DIR", help="write fixture pages for stub_server.py here")
+    parser.add_argument("--trains", type=int, default=300, help="trains in the fixture pages")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.rows:
+        write_csv(args.rows, args.output, args.seed)
+        print(f"Wrote {args.rows} trains to {args.output}")
+    if args.pages:
+        pages = make_pages(args.pages, args.trains, seed=args.seed)
+        print(f"Wrote {args.trains} trains on {pages} listing pages to {args.pages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import json
+import sqlite3
+import time
+
+import pandas as pd
+
+from schema import META_COLUMNS, delay_column, station_codes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trains (
+    train_no   TEXT NOT NULL,
+    timeline   TEXT NOT NULL,
+    train_name TEXT,
+    status     TEXT NOT NULL,
+    row        TEXT,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    error      TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (train_no, timeline)
+);
+
+-- Content hash and fetch time of every page a train's row was built from:
+-- 'listing', 'meta' and 'history:<timeline>'
+CREATE TABLE IF NOT EXISTS sources (
+    train_no   TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    hash       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (train_no, source)
+);
+
+-- Ordered stops of every train's route: [[station, zone, division, km]]
+CREATE TABLE IF NOT EXISTS routes (
+    train_no   TEXT PRIMARY KEY,
+    stops      TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class CheckpointStore:
+    """Per-train scrape state in SQLite, keyed by (train number, timeline).
+
+    Every write is an upsert committed immediately, so a crash loses at most
+    the train in flight and re-running a train never duplicates its row.
+    """
+
+    def __init__(self, path="train_data.db"):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def mark_done(self, trainNo, timeline, trainName, row):
+        self.conn.execute(
+            """INSERT INTO trains (train_no, timeline, train_name, status, row, attempts, error, updated_at)
+               VALUES (?, ?, ?, 'done', ?, 1, NULL, ?)
+               ON CONFLICT (train_no, timeline) DO UPDATE SET
+                   train_name = excluded.train_name, status = 'done', row = excluded.row,
+                   attempts = attempts + 1, error = NULL, updated_at = excluded.updated_at""",
+            (trainNo, timeline, trainName, json.dumps(row), time.time()),
+        )
+        self.conn.commit()
+
+    def mark_failed(self, trainNo, timeline, trainName, error):
+        self.conn.execute(
+            """INSERT INTO trains (train_no, timeline, train_name, status, row, attempts, error, updated_at)
+               VALUES (?, ?, ?, 'failed', NULL, 1, ?, ?)
+               ON CONFLICT (train_no, timeline) DO UPDATE SET
+                   train_name = excluded.train_name, status = 'failed',
+                   attempts = attempts + 1, error = excluded.error, updated_at = excluded.updated_at""",
+            (trainNo, timeline, trainName, str(error), time.time()),
+        )
+        self.conn.commit()
+
+    def mark_refresh_failed(self, trainNo, timeline, error):
+        """A finished train that failed to re-scrape: its row and status stay,
+        and the error puts it on the retry queue until it is done again."""
+        self.conn.execute(
+            "UPDATE trains SET error = ?, updated_at = ? WHERE train_no = ? AND timeline = ? AND status = 'done'",
+            (str(error), time.time(), trainNo, timeline),
+        )
+        self.conn.commit()
+
+    def row(self, trainNo, timeline="1m"):
+        """The stored row of a finished train, or None."""
+        cur = self.conn.execute(
+            "SELECT row FROM trains WHERE train_no = ? AND timeline = ? AND status = 'done'", (trainNo, timeline)
+        )
+        found = cur.fetchone()
+        return json.loads(found[0]) if found else None
+
+    def record_sources(self, trainNo, hashes):
+        now = time.time()
+        self.conn.executemany(
+            """INSERT INTO sources (train_no, source, hash, fetched_at) VALUES (?, ?, ?, ?)
+               ON CONFLICT (train_no, source) DO UPDATE SET hash = excluded.hash, fetched_at = excluded.fetched_at""",
+            [(trainNo, source, digest, now) for source, digest in hashes.items()],
+        )
+        self.conn.commit()
+
+    def sources(self):
+        """{(train no, source): (content hash, fetched at)}"""
+        cur = self.conn.execute("SELECT train_no, source, hash, fetched_at FROM sources")
+        return {(trainNo, source): (digest, fetched) for trainNo, source, digest, fetched in cur}
+
+    def save_route(self, trainNo, stops):
+        self.conn.execute(
+            """INSERT INTO routes (train_no, stops, updated_at) VALUES (?, ?, ?)
+               ON CONFLICT (train_no) DO UPDATE SET stops = excluded.stops, updated_at = excluded.updated_at""",
+            (trainNo, json.dumps(stops), time.time()),
+        )
+        self.conn.commit()
+
+    def routes(self):
+        """{train no: [[station, zone, division, km], ...]} in route order."""
+        cur = self.conn.execute("SELECT train_no, stops FROM routes ORDER BY train_no")
+        return {trainNo: json.loads(stops) for trainNo, stops in cur}
+
+    def done(self, timeline="1m"):
+        cur = self.conn.execute(
+            "SELECT train_no FROM trains WHERE timeline = ? AND status = 'done' AND error IS NULL", (timeline,))
+        return {r[0] for r in cur}
+
+    def exhausted(self, timeline="1m", max_attempts=3):
+        cur = self.conn.execute(
+            "SELECT train_no FROM trains WHERE timeline = ? AND status = 'failed' AND attempts >= ?",
+            (timeline, max_attempts),
+        )
+        return {r[0] for r in cur}
+
+    def retry_queue(self, timeline="1m", max_attempts=3):
+        cur = self.conn.execute(
+            """SELECT train_name, train_no FROM trains
+               WHERE timeline = ? AND (status = 'failed' AND attempts < ? OR status = 'done' AND error IS NOT NULL)
+               ORDER BY updated_at""",
+            (timeline, max_attempts),
+        )
+        return [list(r) for r in cur]
+
+    def counts(self, timeline="1m"):
+        cur = self.conn.execute("SELECT status, COUNT(*) FROM trains WHERE timeline = ? GROUP BY status", (timeline,))
+        return dict(cur.fetchall())
+
+    def to_frame(self, timelines=("1m",)):
+        """Finished trains in the dataset schema, one delay column per timeline.
+        Trains are included when the first timeline is done; the others are
+        left empty where they are missing."""
+        if isinstance(timelines, str):
+            timelines = [timelines]
+        base = timelines[0]
+        cur = self.conn.execute(
+            "SELECT train_no, row FROM trains WHERE timeline = ? AND status = 'done' ORDER BY train_no", (base,)
+        )
+        records = [[trainNo] + json.loads(row) for trainNo, row in cur]
+        df = pd.DataFrame(records, columns=["TrainNo"] + META_COLUMNS + list(station_codes) + [delay_column(base)])
+
+        for timeline in timelines[1:]:
+            cur = self.conn.execute(
+                "SELECT train_no, row FROM trains WHERE timeline = ? AND status = 'done'", (timeline,)
+            )
+            delays = {trainNo: json.loads(row)[-1] for trainNo, row in cur}
+            df[delay_column(timeline)] = df["TrainNo"].map(delays)
+        return df
+
+    def export_csv(self, path="train_data.csv", timelines=("1m",)):
+        df = self.to_frame(timelines).drop(columns=["TrainNo"])
+        df.to_csv(path, index=False)
+        return len(df)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are not serialised
+    fcntl = None
+
+from schema import COLUMNS, station_codes
+
+DIVISIONS = list(station_codes.keys())
+CATEGORICAL = ["Origin", "Destination", "TrainType", "OriginZone", "DestinationZone"]
+MANIFEST = "manifest.json"
+LOCK = ".lock"
+
+# Columnar on-disk layout of train_data.csv: one .npy file per column, the 72
+# division counts as a single (n, 72) uint16 matrix and text columns as
+# integer codes plus a category list. Every file is opened with mmap, so
+# loading only touches the columns that are asked for.
+#
+# Column files carry the generation of the save that wrote them and the
+# manifest names that generation. A rewrite never touches the files of the
+# previous one, which may still be mapped by a reader: it writes a new
+# generation, swaps the manifest, and only then unlinks the old files (their
+# mappings stay valid until they are closed). Saves hold an exclusive lock on
+# the bundle's lock file, so a scraper export and an app rebuild of the same
+# bundle can't delete each other's files.
+
+
+def read_csv(path="train_data.csv"):
+    # Older scraper runs appended batches without a header row. Only empty
+    # cells are missing ("NA" is a station code), and floats are read back
+    # exactly as written.
+    with open(path) as f:
+        has_header = f.readline().startswith(COLUMNS[0] + ",")
+    return pd.read_csv(path, header=0 if has_header else None, names=None if has_header else COLUMNS,
+                       keep_default_na=False, na_values=[""], float_precision="round_trip")
+
+
+def bundle_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".bundle"
+
+
+def _code_dtype(n):
+    return np.int8 if n < 127 else np.int16 if n < 32767 else np.int32
+
+
+def _column_file(path, name, generation):
+    return os.path.join(path, f"{name}.npy" if generation is None else f"{name}.{generation}.npy")
+
+
+@contextmanager
+def _locked(path):
+    with open(os.path.join(path, LOCK), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def save_bundle(df, path, source=None):
+    os.makedirs(path, exist_ok=True)
+    with _locked(path):
+        _save_bundle(df, path, source)
+
+
+def _save_bundle(df, path, source):
+    generation = uuid.uuid4().hex[:12]
+    manifest = {"columns": list(df.columns), "rows": len(df), "categorical": {}, "source": source,
+                "generation": generation}
+
+    divisions = [c for c in DIVISIONS if c in df.columns]
+    if divisions:
+        matrix = df[divisions].to_numpy()
+        if matrix.min(initial=0) < 0 or matrix.max(initial=0) > np.iinfo(np.uint16).max:
+            raise ValueError("division counts do not fit in uint16")
+        np.save(_column_file(path, "divisions", generation), np.ascontiguousarray(matrix, dtype=np.uint16))
+        manifest["divisions"] = divisions
+
+    for col in df.columns:
+        if col in divisions:
+            continue
+        values = df[col]
+        if col in CATEGORICAL or not pd.api.types.is_numeric_dtype(values.dtype):
+            codes, categories = pd.factorize(values.astype(str).where(values.notna()))
+            np.save(_column_file(path, col, generation), codes.astype(_code_dtype(len(categories))))
+            manifest["categorical"][col] = categories.tolist()
+        else:
+            np.save(_column_file(path, col, generation), values.to_numpy())
+
+    # Manifest goes last: a bundle without one is incomplete and gets rebuilt
+    tmp = os.path.join(path, f"{MANIFEST}.{generation}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(path, MANIFEST))
+
+    for name in os.listdir(path):
+        if name.endswith(".npy") and not name.endswith(f".{generation}.npy"):
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:  # still mapped on platforms that don't allow unlinking it
+                pass
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST)) as f:
+        return json.load(f)
+
+
+def load_divisions(path, manifest=None):
+    """The (n, 72) uint16 division matrix, memory-mapped."""
+    manifest = manifest or read_manifest(path)
+    return np.load(_column_file(path, "divisions", manifest.get("generation")), mmap_mode="r")
+
+
+def load_bundle(path, columns=None):
+    manifest = read_manifest(path)
+    columns = manifest["columns"] if columns is None else list(columns)
+    divisions = manifest.get("divisions", [])
+    generation = manifest.get("generation")
+
+    data = {}
+    matrix = None
+    for col in columns:
+        if col in divisions:
+            if matrix is None:
+                matrix = load_divisions(path, manifest)
+            data[col] = matrix[:, divisions.index(col)]
+        elif col in manifest["categorical"]:
+            codes = np.load(_column_file(path, col, generation), mmap_mode="r")
+            data[col] = pd.Categorical.from_codes(codes, manifest["categorical"][col])
+        elif col in manifest["columns"]:
+            data[col] = np.load(_column_file(path, col, generation), mmap_mode="r")
+        else:
+            raise KeyError(col)
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+def source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def build_bundle(csv_path="train_data.csv", path=None):
+    path = path or bundle_path(csv_path)
+    save_bundle(read_csv(csv_path), path, source=source_stamp(csv_path))
+    return path
+
+
+def is_fresh(csv_path, path):
+    try:
+        source = read_manifest(path).get("source")
+    except FileNotFoundError:
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return source is not None and {**source, "path": os.path.abspath(csv_path)} == source_stamp(csv_path)
+
+
+def load_dataset(csv_path="train_data.csv", columns=None):
+    """Load the train dataset, (re)building the columnar bundle next to the CSV
+    whenever the CSV has changed since the bundle was written."""
+    path = bundle_path(csv_path)
+    if not is_fresh(csv_path, path):
+        build_bundle(csv_path, path)
+    try:
+        return load_bundle(path, columns)
+    except FileNotFoundError:  # a save swapped generations between the manifest and the files
+        return load_bundle(path, columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert train_data.csv to the columnar bundle format")
+    parser.add_argument("csv", nargs="?", default="train_data.csv")
+    parser.add_argument("--output", help="bundle directory (default: <csv>.bundle)")
+    parser.add_argument("--to-csv", metavar="CSV", help="write the bundle back out as CSV instead")
+    args = parser.parse_args()
+
+    if args.to_csv:
+        # Bundles written by the scraper also carry TrainNo, which the CSV schema doesn't have
+        df = load_bundle(args.output or bundle_path(args.csv))
+        df.drop(columns=["TrainNo"], errors="ignore").to_csv(args.to_csv, index=False)
+        return
+
+    path = build_bundle(args.csv, args.output)
+    started = time.perf_counter()
+    df = load_bundle(path)
+    print(f"Wrote {path}: {len(df)} rows, loads in {1000 * (time.perf_counter() - started):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# Delay distribution estimates. Bins are right-closed and start at `start`:
+# bin i covers (start + i*width, start + (i+1)*width], the first bin also
+# takes everything <= start and values past the last edge are left out of
+# the counts but not of the total, exactly like the notebook's two-pointer
+# loop. Everything is O(n) in the number of delays (no sorting).
+
+
+def bin_edges(width=4, start=0, stop=310):
+    """Left edges of the bins; the last bin starts at or before `stop`."""
+    return start + width * np.arange(int(np.floor((stop - start) / width)) + 1)
+
+
+def _bin_index(values, width, start, stop):
+    right = bin_edges(width, start, stop) + width
+    return np.searchsorted(right, values, side="left"), len(right)
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values)]
+
+
+def binned_counts(values, width=4, start=0, stop=310):
+    values = _finite(values)
+    idx, nbins = _bin_index(values, width, start, stop)
+    return np.bincount(idx, minlength=nbins + 1)[:nbins], len(values)
+
+
+def binned_pdf(values, width=4, start=0, stop=310):
+    """(bin starts, density) of `values`. Like the notebook's loop, the bins
+    end with the last non-empty one unless some values lie past `stop`."""
+    counts, n = binned_counts(values, width, start, stop)
+    if counts.sum() == n:
+        counts = counts[:np.flatnonzero(counts)[-1] + 1] if n else counts[:0]
+    return bin_edges(width, start, stop)[:len(counts)], counts / (max(n, 1) * width)
+
+
+def binned_cdf(values, width=4, start=0, stop=310):
+    """(bin right edges, P(X <= edge)) of `values`."""
+    counts, n = binned_counts(values, width, start, stop)
+    return bin_edges(width, start, stop) + width, np.cumsum(counts) / max(n, 1)
+
+
+def grouped_pdf(values, keys, width=4, start=0, stop=310, cumulative=False):
+    """Binned PDF (or CDF) of `values` for every distinct key in one pass.
+
+    Returns a DataFrame with one row per key and one column per bin start.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes, groups = pd.factorize(np.asarray(keys), sort=True)
+    keep = np.isfinite(values) & (codes >= 0)
+    codes, values = codes[keep], values[keep]
+
+    idx, nbins = _bin_index(values, width, start, stop)
+    counts = np.bincount(codes * (nbins + 1) + idx, minlength=len(groups) * (nbins + 1))
+    counts = counts.reshape(len(groups), nbins + 1)[:, :nbins]
+    totals = np.maximum(np.bincount(codes, minlength=len(groups)), 1)[:, None]
+
+    result = np.cumsum(counts, axis=1) / totals if cumulative else counts / (totals * width)
+    return pd.DataFrame(result, index=pd.Index(groups, name=getattr(keys, "name", None)),
+                        columns=bin_edges(width, start, stop))
+
+
+def silverman_bandwidth(values):
+    values = _finite(values)
+    q75, q25 = np.percentile(values, [75, 25])
+    spread = min(values.std(), (q75 - q25) / 1.34) or values.std() or 1.0
+    return 0.9 * spread * len(values) ** -0.2
+
+
+def kde(values, bandwidth=None, grid_size=512):
+    """Gaussian kernel density on an even grid.
+
+    The values are linearly binned onto the grid first and the kernel is
+    convolved with the bins, so the cost is linear in the number of values.
+    """
+    values = _finite(values)
+    if not len(values):
+        return np.array([]), np.array([])
+    bandwidth = bandwidth or silverman_bandwidth(values)
+    lo, hi = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    grid = np.linspace(lo, hi, grid_size)
+    dx = grid[1] - grid[0]
+
+    pos = (values - lo) / dx
+    i = np.minimum(pos.astype(np.int64), grid_size - 2)
+    frac = pos - i
+    weights = np.bincount(i, 1 - frac, minlength=grid_size) + np.bincount(i + 1, frac, minlength=grid_size)
+
+    half = min(int(np.ceil(4 * bandwidth / dx)), grid_size - 1)
+    kernel = np.exp(-0.5 * (np.arange(-half, half + 1) * dx / bandwidth) ** 2)
+    kernel /= len(values) * bandwidth * np.sqrt(2 * np.pi)
+    # The kernel can be longer than the grid when the values span less than
+    # about two bandwidths, so "same" mode would not keep the grid's length
+    return grid, np.convolve(weights, kernel, mode="full")[half:half + grid_size]
+
+
+def smooth(pdf, window=11, polyorder=3):
+    """Savitzky-Golay smoothing, as used for the smoothened distribution chart."""
+    from scipy.signal import savgol_filter
+
+    return savgol_filter(np.asarray(pdf, dtype=np.float64), window_length=window, polyorder=polyorder)
+
+
+def pdf_fit(values, width=3, stop=310, window=11, polyorder=3, degree=5, min_x=12):
+    """The notebook's distribution analysis of `values`: a DataFrame of the
+    binned PDF and its smoothed curve per bin start, the polynomial fitted to
+    the smoothed curve and its R^2 for x > min_x. Too few bins to smooth are
+    left raw, and too few to fit give (None, nan)."""
+    x, pdf = binned_pdf(values, width, 0, stop)
+    smoothed = smooth(pdf, window, polyorder) if len(pdf) > window else pdf
+    polynomial, score = poly_fit(x, smoothed, degree, min_x) if len(x) > degree else (None, float("nan"))
+    return pd.DataFrame({"Delay": x, "PDF": pdf, "Smoothed": smoothed}), polynomial, score
+
+
+def r2(y, y_pred):
+    y, y_pred = np.asarray(y, dtype=np.float64), np.asarray(y_pred, dtype=np.float64)
+    total = ((y - y.mean()) ** 2).sum()
+    return 1 - ((y - y_pred) ** 2).sum() / total if total else float("nan")
+
+
+def poly_fit(x, y, degree=5, min_x=None):
+    """Least-squares polynomial fit of y(x). Returns (np.poly1d, R^2), with R^2
+    measured on the points where x > min_x."""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    polynomial = np.poly1d(np.polyfit(x, y, degree))
+    mask = x > min_x if min_x is not None else np.ones(len(x), dtype=bool)
+    return polynomial, r2(y[mask], polynomial(x[mask]))
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Per-train, per-station, per-day delay observations from the etrain history
+# pages. Layout under the store root:
+#
+#   stations.json                 station code <-> integer id (append-only)
+#   rollups.npz                   per station: count, sum, late count and
+#                                 count/sum by day of week
+#   trains/<train>/part-N.npy     observations, one structured array per append
+#   trains/<train>/rollup.npz     per station and by day of week for the train
+#
+# Appends only add files and update the rollups, so hotspot and day-of-week
+# queries read a few small arrays, and per-train queries read one partition.
+
+OBSERVATION = np.dtype([("station", np.int32), ("day", np.int32), ("delay", np.int16)])
+EPOCH = date(1970, 1, 1)
+LATE_MINUTES = 15
+
+
+def _grow(array, size, axis_shape=()):
+    if len(array) >= size:
+        return array
+    grown = np.zeros((size,) + axis_shape, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class HistoryStore:
+
+    def __init__(self, root="history"):
+        self.root = root
+        os.makedirs(os.path.join(root, "trains"), exist_ok=True)
+        self.codes = self._read_json("stations.json", [])
+        self.ids = {c: i for i, c in enumerate(self.codes)}
+        self.rollups = self._read_rollup(os.path.join(root, "rollups.npz"))
+
+    def _read_json(self, name, default):
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            return default
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _read_rollup(path):
+        empty = {"count": np.zeros(0, np.int64), "sum": np.zeros(0, np.int64), "late": np.zeros(0, np.int64),
+                 "dow_count": np.zeros((0, 7), np.int64), "dow_sum": np.zeros((0, 7), np.int64)}
+        if not os.path.exists(path):
+            return empty
+        with np.load(path) as f:
+            return {k: f[k] for k in f.files}
+
+    def _write(self, path, write):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+
+    def _train_dir(self, trainNo):
+        return os.path.join(self.root, "trains", str(trainNo))
+
+    def _station_ids(self, codes):
+        for code in codes:
+            if code not in self.ids:
+                self.ids[code] = len(self.codes)
+                self.codes.append(code)
+        return np.array([self.ids[c] for c in codes], dtype=np.int32)
+
+    @staticmethod
+    def _accumulate(rollup, obs, size):
+        rollup = {k: _grow(v, size, v.shape[1:]) for k, v in rollup.items()}
+        dow = (obs["day"] + 3) % 7  # 1970-01-01 was a Thursday; 0 = Monday
+        delay = obs["delay"].astype(np.int64)
+        rollup["count"] += np.bincount(obs["station"], minlength=size)
+        rollup["sum"] += np.bincount(obs["station"], delay, minlength=size).astype(np.int64)
+        rollup["late"] += np.bincount(obs["station"][delay >= LATE_MINUTES], minlength=size)
+        flat = obs["station"].astype(np.int64) * 7 + dow
+        rollup["dow_count"] += np.bincount(flat, minlength=size * 7).reshape(size, 7)
+        rollup["dow_sum"] += np.bincount(flat, delay, minlength=size * 7).astype(np.int64).reshape(size, 7)
+        return rollup
+
+    def last_day(self, trainNo):
+        rollup = self._read_rollup(os.path.join(self._train_dir(trainNo), "rollup.npz"))
+        return int(rollup["last_day"][0]) if "last_day" in rollup else None
+
+    def _parts(self, trainNo):
+        directory = self._train_dir(trainNo)
+        parts = sorted(f for f in os.listdir(directory) if f.startswith("part-")) if os.path.isdir(directory) else []
+        return np.concatenate([np.load(os.path.join(directory, p)) for p in parts]) if parts else np.empty(0, OBSERVATION)
+
+    @staticmethod
+    def _keys(obs):
+        return obs["day"].astype(np.int64) << 32 | obs["station"].astype(np.int64)
+
+    def append(self, trainNo, records):
+        """Add [(station code, date, delay minutes)] for a train. (Day, station)
+        pairs already stored for the train are skipped, so re-scraping a
+        window, or a longer window after a shorter one, is safe."""
+        if not records:
+            return 0
+        obs = np.empty(len(records), dtype=OBSERVATION)
+        obs["station"] = self._station_ids([r[0] for r in records])
+        obs["day"] = [(r[1] - EPOCH).days for r in records]
+        obs["delay"] = np.clip([r[2] for r in records], -32768, 32767)
+        keys, first = np.unique(self._keys(obs), return_index=True)
+        obs = obs[first[~np.isin(keys, self._keys(self._parts(trainNo)))]]
+        if not len(obs):
+            return 0
+        obs.sort(order=["day", "station"])
+
+        directory = self._train_dir(trainNo)
+        os.makedirs(directory, exist_ok=True)
+        part = len([f for f in os.listdir(directory) if f.startswith("part-")])
+        self._write(os.path.join(directory, f"part-{part}.npy"), lambda f: np.save(f, obs))
+
+        size = len(self.codes)
+        rollup_path = os.path.join(directory, "rollup.npz")
+        train_rollup = self._read_rollup(rollup_path)
+        last = train_rollup.pop("last_day", np.array([obs["day"].max()]))
+        train_rollup = self._accumulate(train_rollup, obs, size)
+        train_rollup["last_day"] = np.maximum(last, obs["day"].max())
+        self._write(rollup_path, lambda f: np.savez(f, **train_rollup))
+
+        self.rollups = self._accumulate(self.rollups, obs, size)
+        self._write(os.path.join(self.root, "rollups.npz"), lambda f: np.savez(f, **self.rollups))
+        self._write(os.path.join(self.root, "stations.json"), lambda f: f.write(json.dumps(self.codes).encode()))
+        return len(obs)
+
+    def observations(self, trainNo, station=None):
+        """All observations of one train as a DataFrame (date, station, delay)."""
+        obs = self._parts(trainNo)
+        if station is not None:
+            obs = obs[obs["station"] == self.ids.get(station, -1)]
+        return pd.DataFrame({
+            "date": pd.to_datetime(obs["day"].astype("int64"), unit="D"),
+            "station": pd.Categorical.from_codes(obs["station"], self.codes) if len(obs) else pd.Categorical([]),
+            "delay": obs["delay"],
+        })
+
+    def rolling_average(self, trainNo, station=None, window=7):
+        """Daily mean delay of a train (optionally at one station) and its
+        `window`-day rolling mean."""
+        obs = self.observations(trainNo, station)
+        daily = obs.groupby("date")["delay"].mean().asfreq("D")
+        return pd.DataFrame({"delay": daily, "rolling": daily.rolling(window, min_periods=1).mean()})
+
+    def _summary(self, rollup):
+        count = rollup["count"]
+        stations = np.flatnonzero(count)
+        return pd.DataFrame({
+            "observations": count[stations],
+            "mean_delay": rollup["sum"][stations] / count[stations],
+            "late_share": rollup["late"][stations] / count[stations],
+        }, index=pd.Index([self.codes[i] for i in stations], name="station"))
+
+    def station_hotspots(self, k=10, min_observations=30, trainNo=None):
+        """Stations with the highest mean delay, network-wide or for one train."""
+        rollup = self.rollups if trainNo is None else self._read_rollup(
+            os.path.join(self._train_dir(trainNo), "rollup.npz"))
+        summary = self._summary(rollup)
+        return summary[summary["observations"] >= min_observations].nlargest(k, "mean_delay")
+
+    def day_of_week(self, station=None, trainNo=None):
+        """Mean delay by day of week (Monday first)."""
+        rollup = self.rollups if trainNo is None else self._read_rollup(
+            os.path.join(self._train_dir(trainNo), "rollup.npz"))
+        if station is None:
+            count, total = rollup["dow_count"].sum(axis=0), rollup["dow_sum"].sum(axis=0)
+        elif station in self.ids and self.ids[station] < len(rollup["dow_count"]):
+            count, total = rollup["dow_count"][self.ids[station]], rollup["dow_sum"][self.ids[station]]
+        else:
+            count, total = np.zeros(7), np.zeros(7)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+        return pd.DataFrame({"observations": count, "mean_delay": mean},
+                            index=["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the per-station running history store")
+    parser.add_argument("--root", default="history")
+    parser.add_argument("--train", help="restrict to one train number")
+    parser.add_argument("--station", help="restrict to one station code")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    store = HistoryStore(args.root)
+    print("Station hotspots:")
+    print(store.station_hotspots(args.top, trainNo=args.train).round(2).to_string())
+    print("\nDay of week:")
+    print(store.day_of_week(args.station, args.train).round(2).to_string())
+    if args.train:
+        print("\nRolling 7-day average:")
+        print(store.rolling_average(args.train, args.station).tail(14).round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
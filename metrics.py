@@ -0,0 +1,131 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+import numpy as np
+import requests
+
+# Counters, per-stage latency histograms and classified errors for the
+# scraper, written as one JSON file that app.py's diagnostics section reads
+# while a run is in progress. Histogram buckets are fixed, so recording an
+# observation is a bisect and two additions. With `sample` below 1 only
+# every (1 / sample)-th call of a stage reads the clock, goes into its
+# histogram and may flush the file; the rest only bump the exact call count.
+# Everything is updated from the event loop thread.
+
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+METRICS_FILE = "scrape_metrics.json"
+
+
+class Histogram:
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, capped at the maximum."""
+        n = sum(self.counts)
+        if not n:
+            return None
+        idx = int(np.searchsorted(np.cumsum(self.counts), q * n))
+        return min(BUCKETS_MS[idx], self.max) if idx < len(BUCKETS_MS) else self.max
+
+
+def classify(error):
+    """Short error class for counting: timeout, connection, http_<status>,
+    or the exception's type name."""
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.ConnectionError):
+        return "connection"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    if isinstance(error, str):
+        return error
+    return type(error).__name__
+
+
+class Metrics:
+
+    def __init__(self, path=None, sample=1.0, flush_interval=5.0):
+        self.path = path
+        self.every = max(1, round(1 / sample)) if sample > 0 else 0
+        self.flush_interval = flush_interval
+        self.started = time.time()
+        self.flushed = 0.0
+        self.counters = {}
+        self.calls = {}
+        self.histograms = {}
+        self.errors = {}
+
+    def _sampled(self, stage):
+        calls = self.calls[stage] = self.calls.get(stage, 0) + 1
+        return self.every and calls % self.every == 0
+
+    @contextmanager
+    def timer(self, stage):
+        # The sampling decision comes first, so unsampled calls don't read the clock
+        if not self._sampled(stage):
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histograms.setdefault(stage, Histogram()).add((time.perf_counter() - started) * 1000)
+            self.flush()
+
+    def error(self, stage, error):
+        kind = classify(error)
+        errors = self.errors.setdefault(stage, {})
+        errors[kind] = errors.get(kind, 0) + 1
+        return kind
+
+    def snapshot(self):
+        stages = {}
+        for stage, calls in self.calls.items():
+            h = self.histograms.get(stage)
+            sampled = sum(h.counts) if h else 0
+            stages[stage] = {
+                "calls": calls,
+                "sampled": sampled,
+                "mean_ms": h.total / sampled if sampled else None,
+                "p50_ms": h.quantile(0.5) if h else None,
+                "p90_ms": h.quantile(0.9) if h else None,
+                "p99_ms": h.quantile(0.99) if h else None,
+                "max_ms": h.max if h else None,
+                # Sampled time scaled up to all calls
+                "total_s": h.total / 1000 * calls / sampled if sampled else None,
+                "buckets": h.counts if h else [],
+            }
+        return {"started_at": self.started, "updated_at": time.time(), "buckets_ms": list(BUCKETS_MS),
+                "counters": self.counters, "stages": stages, "errors": self.errors}
+
+    def flush(self, force=False):
+        """Write the snapshot to `path`, at most every `flush_interval` seconds
+        unless forced. The file is replaced atomically."""
+        if self.path is None or (not force and time.monotonic() - self.flushed < self.flush_interval):
+            return
+        self.flushed = time.monotonic()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, self.path)
+
+
+def read_metrics(path=METRICS_FILE):
+    """The last snapshot written to `path`, or None."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
@@ -0,0 +1,119 @@
+import parsers
+
+# Interchangeable HTML parsers for the scraped pages. "bs4" is the
+# BeautifulSoup html.parser code in parsers.py; "lxml" and "selectolax" pull
+# the same text out with compiled XPath / CSS selectors on a C parser and
+# hand it to the shared row logic there, so every backend returns the same
+# values. Backends whose library isn't installed are simply not offered.
+# Pages a backend has no fast path for (the per-day history tables) go
+# through BeautifulSoup. The "route" parsers return (row, stops) like
+# parsers.parse_route.
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    etree = None
+
+# selectolax 1.0 dropped the Modest parser (selectolax.parser); Lexbor has
+# the same css/css_first/text/attributes API
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+KINDS = ("listing", "history", "history_detail", "route")
+
+BACKENDS = {
+    "bs4": {
+        "listing": parsers.parse_listing_page,
+        "history": parsers.parse_history_page,
+        "history_detail": parsers.parse_history_detail,
+        "route": parsers.parse_route,
+    },
+}
+
+
+if etree is not None:
+    _LISTING_ROWS = etree.XPath("(//table)[1]//tr")
+    _ANCHORS = etree.XPath(".//a")
+    _DELAY_DIVS = etree.XPath("//div[@class='inlineblock pdl5']")
+    _ROUTE_ROWS = etree.XPath("(//table[@class='DataTable RouteList'])[1]//tr")
+    _ROUTE_TABLE = etree.XPath("//table[@class='DataTable RouteList']")
+    _SPANS = etree.XPath(".//span")
+    _CELLS = etree.XPath(".//td")
+
+    def _lxml_tree(html):
+        if not html.strip():
+            return None
+        # lxml refuses str input that carries an XML encoding declaration
+        if html.lstrip().startswith("<?xml"):
+            html = html.encode("utf-8")
+        return lxml_html.document_fromstring(html)
+
+    def lxml_listing(html):
+        tree = _lxml_tree(html)
+        if tree is None:
+            return []
+        return parsers.listing_entries([a.text_content() for a in _ANCHORS(row)] for row in _LISTING_ROWS(tree))
+
+    def lxml_history(html, early="zero"):
+        tree = _lxml_tree(html)
+        return None if tree is None else parsers.average_delay([div.text_content() for div in _DELAY_DIVS(tree)],
+                                                               early)
+
+    def lxml_route(html, trainType="GRB"):
+        tree = _lxml_tree(html)
+        if tree is None or not _ROUTE_TABLE(tree):
+            return None, []
+        rows = ((_SPANS(row)[0].attrib["title"], [td.text_content() for td in _CELLS(row)])
+                for row in _ROUTE_ROWS(tree))
+        return parsers.route_with_stops(rows, trainType)
+
+    BACKENDS["lxml"] = {"listing": lxml_listing, "history": lxml_history, "route": lxml_route}
+
+
+if HTMLParser is not None:
+    def selectolax_listing(html):
+        table = HTMLParser(html).css_first("table")
+        if table is None:
+            return []
+        return parsers.listing_entries([a.text() for a in row.css("a")] for row in table.css("tr"))
+
+    def selectolax_history(html, early="zero"):
+        divs = HTMLParser(html).css('div[class="inlineblock pdl5"]')
+        return parsers.average_delay([div.text() for div in divs], early)
+
+    def _title(span):
+        title = span.attributes.get("title")
+        if title is None:
+            raise KeyError("title")
+        return title
+
+    def selectolax_route(html, trainType="GRB"):
+        table = HTMLParser(html).css_first('table[class="DataTable RouteList"]')
+        if table is None:
+            return None, []
+        rows = ((_title(row.css("span")[0]), [td.text() for td in row.css("td")]) for row in table.css("tr"))
+        return parsers.route_with_stops(rows, trainType)
+
+    BACKENDS["selectolax"] = {"listing": selectolax_listing, "history": selectolax_history,
+                              "route": selectolax_route}
+
+
+DEFAULT_BACKEND = "lxml" if "lxml" in BACKENDS else "bs4"
+
+
+def get_parser(backend, kind):
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown parser backend {backend!r}, available: {', '.join(BACKENDS)}")
+    return BACKENDS[backend].get(kind) or BACKENDS["bs4"][kind]
+
+
+# Module-level so it can be sent to a process pool; `options` go to the
+# parser (e.g. early= for "history")
+def parse_page(backend, kind, html, **options):
+    return get_parser(backend, kind)(html, **options)
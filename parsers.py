@@ -0,0 +1,167 @@
+import re
+from datetime import date, datetime
+
+import numpy as np
+from bs4 import BeautifulSoup
+
+from schema import station_codes
+from timeparse import delay_minutes
+
+
+# Listing page: one row per train with [train number, train name] anchors
+def parse_listing_page(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    tables = soup.find_all('table')
+    if not tables:
+        return []
+
+    return listing_entries([a.text for a in row.find_all('a')] for row in tables[0].find_all('tr'))
+
+
+# The parts below are shared with the other parser backends (parse_backends.py),
+# which only differ in how they pull the text out of the page
+def listing_entries(rows):
+    ans = []
+    for anchors in rows:
+        if len(anchors) == 2:
+            trainNo = anchors[0]
+            trainName = "-".join(word.capitalize() for word in anchors[1].split())
+            ans.append([trainName, trainNo])
+    return ans
+
+
+# Mean of the "Avg. Delay: N Min's" texts that parse; early arrivals are
+# handled by `early` (see timeparse.py), by default counted as on time
+def average_delay(texts, early="zero"):
+    delays = delay_minutes(texts, early)
+    delays = delays[np.isfinite(delays)]
+    return float(delays.mean()) if len(delays) else None
+
+
+# History page: average of the per-station "Avg. Delay" blocks, None if there are none
+def parse_history_page(html, early="zero"):
+    soup = BeautifulSoup(html, 'html.parser')
+    return average_delay([div.text for div in soup.find_all('div', class_='inlineblock pdl5')], early)
+
+
+STATION_RE = re.compile(r"\(([A-Z]{1,5})\)|^([A-Z]{1,5})\b")
+DATE_FORMATS = ["%d %b %Y", "%d-%b-%Y", "%d %b %y", "%d-%b-%y", "%Y-%m-%d", "%d/%m/%Y", "%d %b", "%d-%b"]
+
+
+# Dates without a year get `year`; when that was inferred (not given) and
+# puts the date in the future, the page is from across new year (a scrape on
+# 2 Jan showing "30 Dec") and the date belongs to the year before, as does
+# a 29 Feb the inferred year doesn't have
+def _parse_date(text, year, today=None):
+    for fmt in DATE_FORMATS:
+        if "%y" in fmt.lower():
+            try:
+                return datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+        try:
+            # Parsed with a year, as strptime's default 1900 has no 29 Feb
+            parsed = datetime.strptime(f"{text} {year}", f"{fmt} %Y").date()
+        except ValueError:
+            if today is None:
+                continue
+            try:
+                parsed = datetime.strptime(f"{text} {year - 1}", f"{fmt} %Y").date()
+            except ValueError:
+                continue
+        if today is not None and parsed > today:
+            return _parse_date(text, year - 1)
+        return parsed
+    return None
+
+
+# History page, per station and day: tables whose header row is a station
+# column followed by dates, with one delay cell per station and date.
+# Returns [(station code, date, delay minutes)]; early arrivals stay negative
+# unless `early` says otherwise.
+def parse_history_detail(html, year=None, early="keep"):
+    today = None if year else date.today()
+    year = year or today.year
+    soup = BeautifulSoup(html, 'html.parser')
+    cells = []
+    for table in soup.find_all('table'):
+        rows = table.find_all('tr')
+        if len(rows) < 2:
+            continue
+        header = [c.get_text(" ", strip=True) for c in rows[0].find_all(['th', 'td'])]
+        dates = [_parse_date(h, year, today) for h in header[1:]]
+        if not any(dates):
+            continue
+        for row in rows[1:]:
+            row_cells = row.find_all(['th', 'td'])
+            if not row_cells:
+                continue
+            match = STATION_RE.search(row_cells[0].get_text(" ", strip=True))
+            if not match:
+                continue
+            station = match.group(1) or match.group(2)
+            cells.extend((station, day, cell.get_text(" ", strip=True))
+                         for day, cell in zip(dates, row_cells[1:]) if day is not None)
+    delays = delay_minutes([text for _, _, text in cells], early)
+    return [(station, day, int(delay)) for (station, day, _), delay in zip(cells, delays) if np.isfinite(delay)]
+
+
+# Route table from erail: origin/destination, stop count, distance, zones and
+# the 72-division station count vector. Returns None if the table is missing
+# or its rows don't have the expected shape (e.g. not rendered yet).
+def parse_route_table(html, trainType='GRB'):
+    return parse_route(html, trainType)[0]
+
+
+# Route table plus the ordered stops it was built from:
+# (row or None, [[station code, zone, division or None, distance km]])
+def parse_route(html, trainType='GRB'):
+    soup = BeautifulSoup(html, "html.parser")
+    tables = soup.find_all("table", class_="DataTable RouteList")
+    if not tables:
+        return None, []
+    rows = ((row.find_all('span')[0]["title"], [td.text for td in row.find_all('td')])
+            for row in tables[0].find_all("tr"))
+    return route_with_stops(rows, trainType)
+
+
+def route_with_stops(rows, trainType):
+    stops = []
+    try:
+        return route_row(rows, trainType, stops), stops
+    except (IndexError, KeyError, ValueError):
+        return None, []
+
+
+# `rows` yields (title of the row's first span, texts of its cells); every
+# stop is appended to `stops` when it is given
+def route_row(rows, trainType, stops=None):
+    arr = [0] * 72
+    count, maxDistance, start = 0, 0, 0
+    origin, destination, originZone, destinationZone = "", "", "", ""
+
+    for title_text, data in rows:
+        try:
+            division = title_text.split(",")[2].split("=")[1]
+            arr[station_codes[division]] += 1
+        except (IndexError, KeyError):
+            division = None
+        count += 1
+        maxDistance = int(data[9])
+        if stops is not None:
+            stops.append([data[1].strip(), title_text.split(",")[1].split("=")[1], division, maxDistance])
+
+        if start == 0:
+            start = 1
+            origin = data[1]
+            originZone = title_text.split(",")[1].split("=")[1]
+        else:
+            destination = data[1]
+            destinationZone = title_text.split(",")[1].split("=")[1]
+
+    if count == 0:
+        return None
+
+    res = [origin, destination, count, maxDistance, trainType, originZone, destinationZone]
+    res.extend(arr)
+    return res
@@ -0,0 +1,145 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset import DIVISIONS, load_dataset
+
+NUMERIC = ["StopCount", "MaxDistance"]
+CATEGORIES = ["TrainType", "OriginZone", "DestinationZone"]
+
+
+class FeaturePipeline:
+    """Turns rows of the train_data schema into a dense float32 feature matrix:
+    stop count, distance and log-distance, one-hot train type and zones (with
+    the categories seen at fit time) and the 72 division counts."""
+
+    def __init__(self, categories=None):
+        self.categories = categories or {}
+
+    def fit(self, data):
+        self.categories = {c: sorted(pd.unique(data[c].dropna().astype(str))) for c in CATEGORIES}
+        return self
+
+    @property
+    def names(self):
+        onehot = [f"{c}={v}" for c in CATEGORIES for v in self.categories[c]]
+        return NUMERIC + ["LogDistance"] + onehot + DIVISIONS
+
+    def transform(self, data):
+        n = len(data)
+        X = np.zeros((n, len(self.names)), dtype=np.float32)
+        X[:, 0] = np.asarray(data["StopCount"], dtype=np.float32)
+        X[:, 1] = np.asarray(data["MaxDistance"], dtype=np.float32)
+        X[:, 2] = np.log1p(np.maximum(X[:, 1], 0))
+
+        offset = 3
+        rows = np.arange(n)
+        for c in CATEGORIES:
+            codes = pd.Categorical(np.asarray(data[c]).astype(str), categories=self.categories[c]).codes
+            known = codes >= 0
+            X[rows[known], offset + codes[known]] = 1
+            offset += len(self.categories[c])
+
+        present = [d for d in DIVISIONS if d in data.columns]
+        if present:
+            idx = [offset + DIVISIONS.index(d) for d in present]
+            X[:, idx] = np.asarray(data[present], dtype=np.float32)
+        return X
+
+
+class DelayModel:
+    """Ridge regression on standardised features. Predictions are clipped at
+    zero since early running is counted as on time."""
+
+    def __init__(self, alpha=10.0):
+        self.alpha = alpha
+        self.pipeline = FeaturePipeline()
+
+    def fit(self, data, delay="DelayOneMonth"):
+        data = data[np.isfinite(np.asarray(data[delay], dtype=np.float64))]
+        self.pipeline.fit(data)
+        X = self.pipeline.transform(data).astype(np.float64)
+        y = np.maximum(np.asarray(data[delay], dtype=np.float64), 0)
+
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1
+        Z = (X - self.mean) / self.scale
+        self.intercept = y.mean()
+        self.coef = np.linalg.solve(Z.T @ Z + self.alpha * np.eye(Z.shape[1]), Z.T @ (y - self.intercept))
+        return self
+
+    def predict(self, data):
+        """Predicted delay in minutes for every row of `data`."""
+        X = self.pipeline.transform(data)
+        # Fold the standardisation into the weights so prediction is one mat-vec
+        weights = (self.coef / self.scale).astype(np.float32)
+        bias = self.intercept - (self.mean / self.scale) @ self.coef
+        return np.maximum(X @ weights + bias, 0)
+
+    def save(self, path):
+        np.savez(path, mean=self.mean, scale=self.scale, coef=self.coef, intercept=self.intercept,
+                 alpha=self.alpha, categories=json.dumps(self.pipeline.categories))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            model = cls(float(f["alpha"]))
+            model.mean, model.scale, model.coef = f["mean"], f["scale"], f["coef"]
+            model.intercept = float(f["intercept"])
+            model.pipeline = FeaturePipeline(json.loads(str(f["categories"])))
+        return model
+
+
+class PredictionService:
+    """Predictions for known trains by number. `trains` is a frame in the
+    train_data schema with a TrainNo column; every train in it is predicted
+    in one batch when the service is built, so a lookup is a dict hit. The
+    service is read-only afterwards and shared by every session
+    (st.cache_resource)."""
+
+    def __init__(self, model, trains=None):
+        self.model = model
+        self.predictions = None
+        if trains is not None and "TrainNo" in trains.columns:
+            trains = trains.assign(TrainNo=trains["TrainNo"].astype(str)).drop_duplicates("TrainNo")
+            self.predictions = dict(zip(trains["TrainNo"], model.predict(trains).astype(float).tolist()))
+
+    def predict(self, data):
+        return self.model.predict(data)
+
+    def predict_trains(self, trainNos):
+        """{train number: predicted delay} for the known trains among `trainNos`."""
+        if self.predictions is None:
+            return {}
+        trainNos = [str(t) for t in trainNos]
+        return {t: self.predictions[t] for t in trainNos if t in self.predictions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the delay model and report batch prediction speed")
+    parser.add_argument("csv", nargs="?", default="train_data.csv")
+    parser.add_argument("--delay", default="DelayOneMonth")
+    parser.add_argument("--alpha", type=float, default=10.0)
+    parser.add_argument("--output", default="delay_model.npz")
+    args = parser.parse_args()
+
+    data = load_dataset(args.csv)
+    started = time.perf_counter()
+    model = DelayModel(args.alpha).fit(data, args.delay)
+    trained = time.perf_counter() - started
+
+    started = time.perf_counter()
+    predicted = model.predict(data)
+    elapsed = time.perf_counter() - started
+    error = np.nanmean(np.abs(predicted - np.asarray(data[args.delay], dtype=np.float64)))
+    print(f"Trained on {len(data)} trains in {trained:.2f}s, mean absolute error {error:.1f} min")
+    print(f"Predicted {len(data)} trains in {1000 * elapsed:.1f} ms")
+    model.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra
+
+from checkpoint import CheckpointStore
+from schema import delay_column
+
+# Station-to-station network built from the ordered stops of every scraped
+# route (checkpoint table `routes`). A segment is a pair of consecutive stops,
+# stored once whatever the direction. All structure is CSR arrays:
+#
+#   stations                        station codes, sorted; ids index into it
+#   indptr, indices, edge_segment   adjacency: station i's neighbours are
+#                                   indices[indptr[i]:indptr[i + 1]], over
+#                                   the segments in edge_segment[...]
+#   segment_ends, segment_km        (s, 2) station ids (lower first), length
+#   segment_indptr, segment_trains  trains (rows of train_nos) per segment
+#   train_indptr, train_segments    segments of each train, in route order
+#
+# so per-segment metrics are bincounts over segment_trains, and a stretch
+# between two stations is a shortest path on the km-weighted adjacency.
+
+LATE_MINUTES = 15
+
+
+class RouteGraph:
+
+    def __init__(self, stations, train_nos, segment_ends, segment_km, train_indptr, train_segments):
+        self.stations = np.asarray(stations)
+        self.train_nos = np.asarray(train_nos)
+        self.segment_ends = np.asarray(segment_ends, dtype=np.int32).reshape(-1, 2)
+        self.segment_km = np.asarray(segment_km, dtype=np.float64)
+        self.train_indptr = np.asarray(train_indptr, dtype=np.int64)
+        self.train_segments = np.asarray(train_segments, dtype=np.int32)
+        self.ids = {code: i for i, code in enumerate(self.stations)}
+
+        n, s = len(self.stations), len(self.segment_ends)
+        lo, hi = self.segment_ends[:, 0], self.segment_ends[:, 1]
+        # Segment ids are stored +1 so that segment 0 isn't an implicit zero
+        self._segment_of = sparse.csr_matrix(
+            (np.concatenate([np.arange(1, s + 1)] * 2), (np.concatenate([lo, hi]), np.concatenate([hi, lo]))),
+            shape=(n, n))
+        self.indptr, self.indices = self._segment_of.indptr, self._segment_of.indices
+        self.edge_segment = self._segment_of.data - 1
+
+        # Row of train_nos for every entry of train_segments
+        self._owner = owner = np.repeat(np.arange(len(self.train_nos)), np.diff(self.train_indptr))
+        trains = sparse.csr_matrix((np.ones(len(owner), dtype=np.int8), (self.train_segments, owner)),
+                                   shape=(s, len(self.train_nos)))
+        trains.sum_duplicates()
+        self.segment_indptr, self.segment_trains = trains.indptr, trains.indices
+
+    @classmethod
+    def build(cls, routes):
+        """Graph from {train no: [[station, zone, division, km], ...]}."""
+        train_nos = sorted(t for t, stops in routes.items() if len(stops) > 1)
+        lengths = np.array([len(routes[t]) for t in train_nos], dtype=np.int64)
+        codes = [stop[0] for t in train_nos for stop in routes[t]]
+        km = np.array([stop[3] for t in train_nos for stop in routes[t]], dtype=np.float64)
+        stations, ids = np.unique(np.asarray(codes, dtype=str), return_inverse=True)
+        train = np.repeat(np.arange(len(train_nos)), lengths)
+
+        # Consecutive stops of the same train, skipping repeated stations
+        keep = (train[:-1] == train[1:]) & (ids[:-1] != ids[1:])
+        a, b = ids[:-1][keep], ids[1:][keep]
+        lo, hi = np.minimum(a, b), np.maximum(a, b)
+        keys, segment = np.unique(lo.astype(np.int64) * len(stations) + hi, return_inverse=True)
+        length = np.abs(km[1:] - km[:-1])[keep]
+        uses = np.bincount(segment, minlength=len(keys))
+        segment_km = np.bincount(segment, length, minlength=len(keys)) / np.maximum(uses, 1)
+
+        train_indptr = np.concatenate([[0], np.cumsum(np.bincount(train[:-1][keep], minlength=len(train_nos)))])
+        return cls(stations, train_nos, np.column_stack([keys // len(stations), keys % len(stations)]),
+                   segment_km, train_indptr, segment)
+
+    @classmethod
+    def from_checkpoint(cls, store):
+        return cls.build(store.routes())
+
+    def save(self, path):
+        np.savez(path, stations=self.stations, train_nos=self.train_nos, segment_ends=self.segment_ends,
+                 segment_km=self.segment_km, train_indptr=self.train_indptr, train_segments=self.train_segments)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(f["stations"], f["train_nos"], f["segment_ends"], f["segment_km"], f["train_indptr"],
+                       f["train_segments"])
+
+    def _delays(self, delays):
+        # Delay per train in train_nos order; NaN where unknown
+        if delays is None:
+            return np.full(len(self.train_nos), np.nan)
+        return pd.Series(delays, dtype=np.float64).reindex(self.train_nos.astype(str)).to_numpy()
+
+    def segments(self, delays=None, late=LATE_MINUTES):
+        """Every segment with its length, train count and, given {train no:
+        delay minutes}, how many of those trains run late and their mean delay."""
+        d = self._delays(delays)[self.segment_trains]
+        segment = np.repeat(np.arange(len(self.segment_ends)), np.diff(self.segment_indptr))
+        known = np.isfinite(d)
+        with_delay = np.bincount(segment[known], minlength=len(self.segment_ends))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(segment[known], d[known], minlength=len(self.segment_ends)) / with_delay
+        return pd.DataFrame({
+            "from": self.stations[self.segment_ends[:, 0]],
+            "to": self.stations[self.segment_ends[:, 1]],
+            "km": self.segment_km,
+            "trains": np.diff(self.segment_indptr),
+            "delayed_trains": np.bincount(segment[known & (d >= late)], minlength=len(self.segment_ends)),
+            "mean_delay": mean,
+        })
+
+    def path(self, origin, destination):
+        """Segment ids along the shortest (by km) path between two stations."""
+        a, b = self.ids[origin], self.ids[destination]
+        weights = sparse.csr_matrix((np.maximum(self.segment_km[self.edge_segment], 0.1), self.indices, self.indptr),
+                                    shape=self._segment_of.shape)
+        _, predecessors = dijkstra(weights, directed=False, indices=a, return_predecessors=True)
+        if a != b and predecessors[b] < 0:
+            raise ValueError(f"no route between {origin} and {destination}")
+        stops = [b]
+        while stops[-1] != a:
+            stops.append(predecessors[stops[-1]])
+        stops = stops[::-1]
+        return np.asarray(self._segment_of[stops[:-1], stops[1:]]).ravel() - 1
+
+    def stretch(self, origin, destination, delays=None, late=LATE_MINUTES):
+        """Trains over the stretch between two stations: those running all of
+        it and those sharing any segment of it, and how many of each are late."""
+        path = self.path(origin, destination)
+        if not len(path):
+            raise ValueError("a stretch needs two different stations")
+        on_path = np.zeros(len(self.segment_ends), dtype=bool)
+        on_path[path] = True
+        # Distinct segments of the path each train runs
+        hits = on_path[self.train_segments]
+        s = len(self.segment_ends)
+        pairs = np.unique(self._owner[hits].astype(np.int64) * s + self.train_segments[hits])
+        used = np.bincount(pairs // s, minlength=len(self.train_nos))
+        d = self._delays(delays)
+        late_trains = np.isfinite(d) & (d >= late)
+        full, shared = used == len(path), used > 0
+        return {
+            "stations": [self.stations[self.segment_ends[seg]].tolist() for seg in path],
+            "km": float(self.segment_km[path].sum()),
+            "segments": len(path),
+            "trains_full": int(full.sum()),
+            "delayed_full": int((full & late_trains).sum()),
+            "trains_shared": int(shared.sum()),
+            "delayed_shared": int((shared & late_trains).sum()),
+            "mean_delay_shared": float(np.nanmean(d[shared])) if np.isfinite(d[shared]).any() else None,
+            "trains": self.train_nos[shared].tolist(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment-level congestion from the scraped route network")
+    parser.add_argument("--checkpoint", default="train_data.db")
+    parser.add_argument("--timeline", default="1m", help="delay history window to rate trains by")
+    parser.add_argument("--late", type=float, default=LATE_MINUTES, help="minutes of delay that count as late")
+    parser.add_argument("--stretch", nargs=2, metavar=("FROM", "TO"), help="e.g. --stretch DDU PRYJ")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="also save the graph arrays to this .npz file")
+    args = parser.parse_args()
+
+    store = CheckpointStore(args.checkpoint)
+    started = time.perf_counter()
+    graph = RouteGraph.from_checkpoint(store)
+    frame = store.to_frame([args.timeline])
+    delays = dict(zip(frame["TrainNo"].astype(str), frame[delay_column(args.timeline)]))
+    store.close()
+    print(f"{len(graph.stations)} stations, {len(graph.segment_ends)} segments, {len(graph.train_nos)} trains "
+          f"(built in {1000 * (time.perf_counter() - started):.0f} ms)")
+    if args.output:
+        graph.save(args.output)
+
+    segments = graph.segments(delays, args.late)
+    print(f"\nBusiest segments by late trains (>= {args.late:g} min):")
+    print(segments.sort_values(["delayed_trains", "trains"], ascending=False).head(args.top).round(1).to_string())
+
+    if args.stretch:
+        s = graph.stretch(*args.stretch, delays=delays, late=args.late)
+        print(f"\n{args.stretch[0]}-{args.stretch[1]}: {s['segments']} segments, {s['km']:.0f} km")
+        print(f"  whole stretch: {s['trains_full']} trains, {s['delayed_full']} late")
+        print(f"  any part:      {s['trains_shared']} trains, {s['delayed_shared']} late")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# The dataset schema, shared by the scraper, the checkpoint, the columnar
+# bundle and the app. No third-party imports, so the app can load it without
+# the scraping dependencies.
+
+station_codes = {
+    "ADI": 0, "ADRA": 1, "AGRA": 2, "AII": 3, "APDJ": 4, "ASN": 5, "CSTM":6, "BCT": 7,
+    "BKN": 8, "BPL": 9, "BRC": 10, "BSB": 11, "BSL": 12, "BSP": 13, "BVC": 14, "BZA": 15,
+    "CKP": 16, "DDU": 17, "DHN": 18, "DLI": 19, "DNR": 20, "EDFC": 21, "FZR": 22, "GNT": 23,
+    "GTL": 24, "HWH": 25, "HYB": 26, "IZN": 27, "JAT": 28, "JBP": 29, "JHS": 30, "JP": 31,
+    "JU": 32, "KAWR": 33, "KGP": 34, "KIR": 35, "KOTA": 36, "KUR": 37, "LJN": 38, "LKO": 39,
+    "LMG": 40, "MAS": 41, "MB": 42, "MDU": 43, "MLDT": 44, "MYS": 45, "NAG": 46, "NED": 47,
+    "NEP": 48, "NGP": 49, "PGT": 50, "PRYJ": 51, "PUNE": 52, "R": 53, "RJT": 54, "RN": 55,
+    "RNC": 56, "RNY": 57, "RTM": 58, "SA": 59, "SBC": 60, "SBP": 61, "SC": 62, "SDAH": 63,
+    "SEE": 64, "SPJ": 65, "SUR": 66, "TPJ": 67, "TSK": 68, "TVC": 69, "UBL": 70,"WAT":71
+}
+
+META_COLUMNS = ["Origin", "Destination", "StopCount", "MaxDistance", "TrainType", "OriginZone", "DestinationZone"]
+COLUMNS = META_COLUMNS + list(station_codes.keys()) + ["DelayOneMonth"]
+
+# etrain history windows (the `d` query parameter) and their dataset columns
+HORIZON_COLUMNS = {"1m": "DelayOneMonth", "3m": "DelayThreeMonth", "6m": "DelaySixMonth", "1y": "DelayOneYear"}
+
+
+def delay_column(timeline):
+    return HORIZON_COLUMNS.get(timeline, f"Delay_{timeline}")
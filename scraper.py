@@ -0,0 +1,515 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from urllib.parse import quote, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from checkpoint import CheckpointStore
+from dataset import bundle_path, save_bundle, source_stamp
+from history_store import HistoryStore
+from metrics import METRICS_FILE, Metrics
+from parse_backends import BACKENDS, DEFAULT_BACKEND, parse_page
+from schema import COLUMNS, delay_column
+from streaming import LIVE_FILE, StreamAggregator, consume
+from timeparse import EARLY_POLICIES
+
+ETRAIN_URL = "https://etrain.info"
+ERAIL_URL = "https://erail.in"
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.150 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/537.36",
+]
+
+
+def browser_headers():
+    return {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept-Language": "en-US,en;q=0.9",
+        "Connection": "keep-alive",
+        "Referer": "https://www.google.com/",
+        "DNT": "1",
+        "Upgrade-Insecure-Requests": "1"
+    }
+
+
+class ScrapeError(Exception):
+    pass
+
+
+# Stands in for a part of a train's row whose page has not changed since the
+# stored copy; the caller fills it in from the checkpoint
+UNCHANGED = object()
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Saved pages are keyed by path+query so the stub server can replay them
+def page_filename(url):
+    parts = urlsplit(url)
+    key = parts.path + ("?" + parts.query if parts.query else "")
+    return quote(key, safe="") + ".html"
+
+
+class HostLimiter:
+    """Token bucket per host: at most `rate` requests/sec with bursts of `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ScrapeEngine:
+    """Bounded-concurrency scraper over pooled keep-alive sessions.
+
+    `concurrency` trains are in flight at once; for each one the etrain history
+    and the erail route page are fetched in parallel. Every host gets its own
+    session (connection pool) and its own rate limit.
+
+    With `known` ({(train no, source): (content hash, fetched at)}) the engine
+    refreshes incrementally: a page fetched less than its TTL ago is not
+    fetched again, a page whose hash matches is not parsed again, and the
+    route page is re-checked early when the train's listing entry changed.
+    Either case yields UNCHANGED in place of that part of the row, and the
+    hashes of what was fetched are left in `sources[train no]`.
+
+    Pages are parsed with the `parser` backend (see parse_backends.py), in a
+    pool of `parse_workers` processes when that is non-zero so parsing does
+    not hold up the event loop. `early` is the early-arrival policy for the
+    average delays (see timeparse.py).
+
+    Latencies of every stage (listing_fetch, history_fetch, meta_fetch,
+    render, parse, persist) and classified errors go to `metrics`; `stats`
+    is its counters.
+    """
+
+    def __init__(self, etrain_url=ETRAIN_URL, erail_url=ERAIL_URL, concurrency=16,
+                 host_rate=4.0, host_burst=4, render_concurrency=2, timeout=30, save_pages=None,
+                 timelines=("1m",), render_fallback=True, on_history=None, on_route=None, known=None,
+                 delay_ttl=None, meta_ttl=None, parser=DEFAULT_BACKEND, parse_workers=0, metrics=None,
+                 early="zero"):
+        self.etrain_url = etrain_url.rstrip("/")
+        self.erail_url = erail_url.rstrip("/")
+        self.concurrency = concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.timeout = timeout
+        self.save_pages = save_pages
+        self.timelines = list(timelines)
+        self.inflight = {}
+        self.render_fallback = render_fallback
+        self.on_history = on_history
+        self.on_route = on_route
+        self.known = known or {}
+        self.delay_ttl = delay_ttl
+        self.meta_ttl = meta_ttl
+        self.sources = {}
+        self.parser = parser
+        self.parse_pool = ProcessPoolExecutor(parse_workers) if parse_workers else None
+        # requests is blocking, so every request in flight needs a thread: a
+        # train fetches its route page and each timeline at once. The loop's
+        # default executor would cap this at min(32, cpus + 4).
+        self.fetch_workers = concurrency * (1 + len(self.timelines))
+        self.fetch_pool = ThreadPoolExecutor(self.fetch_workers, thread_name_prefix="fetch")
+        self.early = early
+        self.sessions = {}
+        self.limiters = {}
+        self.render_slots = asyncio.Semaphore(render_concurrency)
+        self.render_session = None
+        self.metrics = metrics or Metrics()
+        self.stats = self.metrics.counters
+        self.stats.update({"trains": 0, "ok": 0, "errors": 0, "requests": 0, "deduplicated": 0,
+                           "meta_static": 0, "meta_rendered": 0, "fresh": 0, "unchanged": 0,
+                           "listing_errors": 0})
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.sessions:
+            session = requests.Session()
+            # As many kept-alive connections as requests that can be in flight
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.fetch_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(browser_headers())
+            self.sessions[host] = session
+            self.limiters[host] = HostLimiter(self.host_rate, self.host_burst)
+        return self.sessions[host], self.limiters[host]
+
+    def _save(self, url, text):
+        if self.save_pages:
+            with open(os.path.join(self.save_pages, page_filename(url)), "w", encoding="utf-8") as f:
+                f.write(text)
+
+    async def fetch(self, url, stage="fetch"):
+        # Concurrent requests for the same URL share one round trip
+        if url in self.inflight:
+            self.stats["deduplicated"] += 1
+            return await asyncio.shield(self.inflight[url])
+        task = asyncio.ensure_future(self._fetch(url, stage))
+        self.inflight[url] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self.inflight.pop(url, None)
+
+    async def _fetch(self, url, stage):
+        session, limiter = self._host(url)
+        await limiter.acquire()
+        self.stats["requests"] += 1
+        try:
+            with self.metrics.timer(stage):
+                response = await asyncio.get_running_loop().run_in_executor(
+                    self.fetch_pool, partial(session.get, url, timeout=self.timeout))
+        except Exception as e:
+            self.metrics.error(stage, e)
+            raise
+        if response.status_code != 200:
+            self.metrics.error(stage, f"http_{response.status_code}")
+            return None
+        self._save(url, response.text)
+        return response.text
+
+    async def render(self, url):
+        # Headless Chromium is shared by the whole run and only a few pages render at once
+        from requests_html import AsyncHTMLSession
+
+        async with self.render_slots:
+            if self.render_session is None:
+                self.render_session = AsyncHTMLSession()
+            _, limiter = self._host(url)
+            await limiter.acquire()
+            self.stats["requests"] += 1
+            with self.metrics.timer("render"):
+                response = await self.render_session.get(url, headers=browser_headers(), timeout=self.timeout)
+                await response.html.arender(wait=random.uniform(2, 5), sleep=random.uniform(2, 5))
+            html = response.html.html
+        self._save(url, html)
+        return html
+
+    def _fresh(self, trainNo, source, ttl):
+        known = self.known.get((trainNo, source))
+        if ttl is None or known is None or time.time() - known[1] >= ttl:
+            return False
+        self.stats["fresh"] += 1
+        return True
+
+    def _unchanged(self, trainNo, source, html):
+        digest = content_hash(html)
+        self.sources.setdefault(trainNo, {})[source] = digest
+        known = self.known.get((trainNo, source))
+        if known is None or known[0] != digest:
+            return False
+        self.stats["unchanged"] += 1
+        return True
+
+    async def parse(self, kind, html, **options):
+        with self.metrics.timer("parse"):
+            if self.parse_pool is None:
+                return parse_page(self.parser, kind, html, **options)
+            return await asyncio.get_running_loop().run_in_executor(
+                self.parse_pool, partial(parse_page, self.parser, kind, html, **options))
+
+    async def get_listing(self, pageNo):
+        # A listing page that fails only loses its own trains; the run goes on.
+        # Fetch exceptions are already counted under listing_fetch by _fetch.
+        try:
+            html = await self.fetch(f"{self.etrain_url}/list/GRB-TRAINS?page={pageNo}", "listing_fetch")
+        except Exception:
+            self.stats["listing_errors"] += 1
+            return []
+        if not html:
+            self.stats["listing_errors"] += 1
+            return []
+        try:
+            return await self.parse("listing", html)
+        except Exception as e:
+            self.stats["listing_errors"] += 1
+            self.metrics.error("listing_fetch", e)
+            return []
+
+    async def get_train_delays(self, trainNo, trainName, timeline):
+        source = f"history:{timeline}"
+        if self._fresh(trainNo, source, self.delay_ttl):
+            return UNCHANGED
+        html = await self.fetch(f"{self.etrain_url}/train/{trainName}-{trainNo}/history?d={timeline}", "history_fetch")
+        if not html:
+            return None
+        if self._unchanged(trainNo, source, html):
+            return UNCHANGED
+        if self.on_history is not None:
+            self.on_history(trainNo, await self.parse("history_detail", html))
+        return await self.parse("history", html, early=self.early)
+
+    async def get_train_meta(self, trainNo, listing_changed=False):
+        # Fast path: parse the route table from the static page. Chromium is
+        # only started for pages where that fails.
+        if not listing_changed and self._fresh(trainNo, "meta", self.meta_ttl):
+            return UNCHANGED
+        url = f"{self.erail_url}/train-enquiry/{trainNo}"
+        html = await self.fetch(url, "meta_fetch")
+        if html and self._unchanged(trainNo, "meta", html):
+            return UNCHANGED
+        res, stops = await self.parse("route", html) if html else (None, [])
+        if res is not None:
+            self.stats["meta_static"] += 1
+        elif self.render_fallback:
+            self.stats["meta_rendered"] += 1
+            res, stops = await self.parse("route", await self.render(url))
+        if res is not None and self.on_route is not None:
+            self.on_route(trainNo, stops)
+        return res
+
+    async def scrape_train(self, trainName, trainNo):
+        """Route metadata followed by one average delay per timeline (None
+        where that history page had no data). The route page is fetched
+        once however many timelines there are, all requests in parallel."""
+        listing = self.sources.setdefault(trainNo, {})["listing"] = content_hash(trainName)
+        known = self.known.get((trainNo, "listing"))
+        meta, *delays = await asyncio.gather(
+            self.get_train_meta(trainNo, listing_changed=known is not None and known[0] != listing),
+            *[self.get_train_delays(trainNo, trainName, t) for t in self.timelines],
+        )
+        if meta is None:
+            raise ScrapeError("route table not found")
+        if all(delay is None for delay in delays):
+            raise ScrapeError("no delay history")
+        return ([UNCHANGED] if meta is UNCHANGED else meta) + delays
+
+    async def _worker(self, queue, on_result):
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                trainName, trainNo = item
+                self.stats["trains"] += 1
+                try:
+                    row, error = await self.scrape_train(trainName, trainNo), None
+                except Exception as e:
+                    row, error = None, e
+                if row is None:
+                    self.stats["errors"] += 1
+                    # ScrapeError messages are already a classification
+                    self.metrics.error("train", str(error) if isinstance(error, ScrapeError) else error)
+                else:
+                    self.stats["ok"] += 1
+                with self.metrics.timer("persist"):
+                    on_result(trainName, trainNo, row, error)
+            finally:
+                queue.task_done()
+
+    async def run(self, pages, on_result, skip=(), extra=()):
+        """Scrape every train on the listing `pages` plus `extra` [name, number]
+        pairs, except train numbers in `skip`. `on_result(name, no, row, error)`
+        is called once per train."""
+        started = time.monotonic()
+        queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        workers = [asyncio.create_task(self._worker(queue, on_result)) for _ in range(self.concurrency)]
+
+        seen = set(skip)
+
+        async def enqueue(trains):
+            for trainName, trainNo in trains:
+                if trainNo not in seen:
+                    seen.add(trainNo)
+                    await queue.put([trainName, trainNo])
+
+        await enqueue(extra)
+        for trains in asyncio.as_completed([self.get_listing(p) for p in pages]):
+            await enqueue(await trains)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+        elapsed = time.monotonic() - started
+        self.stats["elapsed"] = elapsed
+        self.stats["trains_per_sec"] = self.stats["trains"] / elapsed if elapsed else 0.0
+        self.metrics.flush(force=True)
+        return self.stats
+
+    async def close(self):
+        for session in self.sessions.values():
+            session.close()
+        if self.render_session is not None:
+            await self.render_session.close()
+        self.fetch_pool.shutdown()
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
+
+
+async def scrape(args):
+    store = CheckpointStore(args.checkpoint)
+    timelines = args.timeline.split(",")
+    engine = ScrapeEngine(args.etrain_url, args.erail_url, concurrency=args.concurrency,
+                          host_rate=args.host_rate, save_pages=args.save_pages, timelines=timelines,
+                          render_fallback=not args.no_render,
+                          on_history=HistoryStore(args.history).append if args.history else None,
+                          on_route=store.save_route,
+                          known=store.sources() if args.refresh else None,
+                          delay_ttl=args.delay_ttl * 3600 if args.refresh else None,
+                          meta_ttl=args.meta_ttl * 86400 if args.refresh else None,
+                          parser=args.parser, parse_workers=args.parse_workers,
+                          metrics=Metrics(args.metrics, sample=args.metrics_sample), early=args.early)
+
+    # A resumed run skips finished trains and trains that failed too often,
+    # and starts with the retry queue so earlier failures are not lost
+    skip, extra = set(), []
+    if args.resume:
+        skip = set.intersection(*[store.done(t) for t in timelines]) | store.exhausted(timelines[0], args.max_attempts)
+        extra = [train for t in timelines for train in store.retry_queue(t, args.max_attempts)]
+        print(f"Resuming: {len(skip)} trains skipped, {len(extra)} queued for retry")
+    pages = [] if args.retry_only else range(1, args.pages + 1)
+
+    # Rows written or replaced this run, per timeline
+    updated = {t: 0 for t in timelines}
+
+    # With --stream, every scraped train also goes to a live aggregator (one
+    # delay column per timeline) whose snapshots the dashboard reads
+    stream = asyncio.Queue() if args.stream else None
+
+    def on_result(trainName, trainNo, row, error):
+        sources = engine.sources.pop(trainNo, {})
+        stored = {t: store.row(trainNo, t) for t in timelines}
+        meta, delays = (None, [None] * len(timelines)) if row is None else (row[:-len(timelines)], row[-len(timelines):])
+        if meta == [UNCHANGED]:
+            meta = next((r[:-1] for r in stored.values() if r), None)
+            error = None if meta is not None else "route table not in checkpoint"
+        # A train that was scraped before keeps its row when a re-scrape
+        # fails (a transient 404 or timeout); the failure only queues a retry
+        def failed(t, error):
+            if stored[t]:
+                store.mark_refresh_failed(trainNo, t, error)
+            else:
+                store.mark_failed(trainNo, t, trainName, error)
+
+        if meta is None:
+            if row is not None:
+                engine.metrics.error("train", error)
+            for t in timelines:
+                failed(t, error)
+            return
+
+        live = dict(zip(COLUMNS[:-1], meta))
+        for t, delay in zip(timelines, delays):
+            if delay is UNCHANGED:
+                delay = stored[t][-1] if stored[t] else None
+            if delay is None:
+                sources.pop(f"history:{t}", None)
+                failed(t, "no delay history")
+                continue
+            # Also for an unchanged row, to clear an earlier refresh failure
+            store.mark_done(trainNo, t, trainName, meta + [delay])
+            if meta + [delay] != stored[t]:
+                updated[t] += 1
+            live[delay_column(t)] = delay
+        if stream is not None:
+            stream.put_nowait(live)
+        store.record_sources(trainNo, sources)
+
+    consumer = None
+    if stream is not None:
+        consumer = asyncio.create_task(consume(stream, StreamAggregator([delay_column(t) for t in timelines]),
+                                               args.stream))
+    try:
+        stats = await engine.run(pages, on_result, skip=skip, extra=extra)
+    finally:
+        await engine.close()
+        if consumer is not None:
+            stream.put_nowait(None)
+            live = await consumer
+            print(f"Live statistics over {live.rows} trains written to {args.stream}")
+
+    for t in timelines:
+        print(f"{delay_column(t)}: {updated[t]} trains updated this run")
+
+    written = store.export_csv(args.output, timelines)
+    # The bundle keeps train numbers, which the CSV schema has no column for
+    save_bundle(store.to_frame(timelines), bundle_path(args.output), source=source_stamp(args.output))
+    print(f"{written} trains written to {args.output} ({store.counts(timelines[0])})")
+    store.close()
+
+    print(f"Scraped {stats['ok']}/{stats['trains']} trains in {stats['elapsed']:.1f}s "
+          f"({stats['trains_per_sec']:.2f} trains/sec, {stats['requests']} requests, "
+          f"{stats['deduplicated']} deduplicated)")
+    if args.refresh:
+        print(f"Refresh: {stats['fresh']} pages within their TTL, {stats['unchanged']} fetched but unchanged")
+    fetched = stats["meta_static"] + stats["meta_rendered"]
+    if fetched:
+        print(f"Route pages rendered: {stats['meta_rendered']}/{fetched} "
+              f"({100 * stats['meta_rendered'] / fetched:.1f}% fell back to headless rendering)")
+    print("Total Number of errors =", stats["errors"])
+    if stats["listing_errors"]:
+        print(f"Listing pages that failed: {stats['listing_errors']}/{len(pages)} (their trains were not scraped)")
+    for stage, errors in engine.metrics.errors.items():
+        print(f"  {stage}: " + ", ".join(f"{kind} {n}" for kind, n in sorted(errors.items(), key=lambda e: -e[1])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape train routes and delays from etrain.info and erail.in")
+    parser.add_argument("--pages", type=int, default=3, help="number of etrain listing pages to walk")
+    parser.add_argument("--output", default="train_data.csv")
+    parser.add_argument("--checkpoint", default="train_data.db", help="SQLite file holding per-train state")
+    parser.add_argument("--timeline", default="1m",
+                        help="comma-separated delay history windows passed to etrain, e.g. 1m,3m,6m")
+    parser.add_argument("--resume", action="store_true", help="skip trains already done in the checkpoint")
+    parser.add_argument("--retry-only", action="store_true", help="with --resume, only retry failed trains")
+    parser.add_argument("--refresh", action="store_true",
+                        help="incremental update: only re-fetch pages that are past their TTL or have changed")
+    parser.add_argument("--delay-ttl", type=float, default=24, help="with --refresh, hours before delays are re-fetched")
+    parser.add_argument("--meta-ttl", type=float, default=30,
+                        help="with --refresh, days before an unchanged listing entry's route page is re-checked")
+    parser.add_argument("--max-attempts", type=int, default=3, help="give up on a train after this many failures")
+    parser.add_argument("--concurrency", type=int, default=16, help="trains in flight at once")
+    parser.add_argument("--host-rate", type=float, default=4.0, help="requests/sec per host, 0 for unlimited")
+    parser.add_argument("--parser", default=DEFAULT_BACKEND, choices=list(BACKENDS), help="HTML parser backend")
+    parser.add_argument("--parse-workers", type=int, default=0, help="parse pages in this many processes")
+    parser.add_argument("--early", default="zero", choices=EARLY_POLICIES,
+                        help="early arrivals in the average delay: keep negative, count as zero, or drop")
+    parser.add_argument("--etrain-url", default=ETRAIN_URL)
+    parser.add_argument("--erail-url", default=ERAIL_URL)
+    parser.add_argument("--no-render", action="store_true",
+                        help="never start headless Chromium; trains whose static page has no route table fail")
+    parser.add_argument("--history", metavar="DIR", help="also keep per-station, per-day delays in this store")
+    parser.add_argument("--metrics", default=METRICS_FILE, help="stage latencies and error counts are written here")
+    parser.add_argument("--metrics-sample", type=float, default=1.0,
+                        help="fraction of calls timed into the latency histograms")
+    parser.add_argument("--stream", nargs="?", const=LIVE_FILE, metavar="PATH",
+                        help=f"publish running statistics of every timeline for the dashboard while scraping "
+                             f"(default {LIVE_FILE})")
+    parser.add_argument("--save-pages", metavar="DIR", help="keep every fetched page for offline replay")
+    args = parser.parse_args()
+
+    if args.save_pages:
+        os.makedirs(args.save_pages, exist_ok=True)
+    asyncio.run(scrape(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import json
+import math
+import os
+import time
+from bisect import bisect_left
+
+from aggregations import BY_DISTANCE, BY_STOPS, BY_TYPE, BY_ZONE, DELAY_BUCKET_LABELS, DELAY_BUCKETS
+
+# Live statistics while a scrape is running. Rows go through an asyncio.Queue
+# into a StreamAggregator, which keeps only fixed-size state per group: a
+# Welford mean/variance, a log-bucketed quantile sketch and delay-bucket
+# counts, so memory depends on the number of groups and not on the rows
+# seen. Snapshots are published as JSON with an atomic rename, for app.py to
+# poll.
+
+LIVE_FILE = "live_stats.json"
+STREAM_SPECS = (BY_TYPE, BY_ZONE, BY_DISTANCE, BY_STOPS)
+SNAPSHOT_QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+
+class RunningStats:
+    """Count, mean, variance, min and max in one pass (Welford), mergeable
+    with Chan's update."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class QuantileSketch:
+    """Quantiles to within `relative_accuracy` of the true value, from
+    logarithmically spaced buckets (as in DDSketch). Negative values (early
+    arrivals kept with --early keep) go to a mirrored set of buckets, and
+    values within `min_value` of zero share one bucket. Sketches with the
+    same accuracy merge by adding bucket counts."""
+
+    def __init__(self, relative_accuracy=0.02, min_value=0.5):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.zeros = 0
+        self.buckets = {}
+        self.negatives = {}
+        self.count = 0
+
+    def add(self, x):
+        self.count += 1
+        if abs(x) < self.min_value:
+            self.zeros += 1
+            return
+        store = self.buckets if x > 0 else self.negatives
+        key = math.ceil(math.log(abs(x)) / self.log_gamma)
+        store[key] = store.get(key, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.zeros += other.zeros
+        for mine, theirs in ((self.buckets, other.buckets), (self.negatives, other.negatives)):
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        # Ascending order: most negative first, then zero, then positives
+        ordered = [(-self._value(key), self.negatives[key]) for key in sorted(self.negatives, reverse=True)]
+        ordered.append((0.0, self.zeros))
+        ordered += [(self._value(key), self.buckets[key]) for key in sorted(self.buckets)]
+        seen = 0
+        for value, n in ordered:
+            seen += n
+            if rank < seen:
+                return value
+        return next(value for value, n in reversed(ordered) if n)
+
+
+class GroupState:
+
+    def __init__(self, relative_accuracy):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.buckets = [0] * len(DELAY_BUCKET_LABELS)
+
+    def add(self, x):
+        self.stats.add(x)
+        self.sketch.add(x)
+        self.buckets[bisect_left(DELAY_BUCKETS, x, 1, len(DELAY_BUCKETS) - 1) - 1] += 1
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        return self
+
+    def summary(self):
+        s = self.stats
+        out = {"count": s.count, "mean": s.mean, "std": s.std, "min": s.min, "max": s.max}
+        for q in SNAPSHOT_QUANTILES:
+            out["median" if q == 0.5 else f"q{round(q * 100)}"] = self.sketch.quantile(q)
+        out["buckets"] = dict(zip(DELAY_BUCKET_LABELS, self.buckets))
+        return out
+
+
+def group_label(spec, row):
+    """The group of `spec` a row (dict) falls in, or None."""
+    value = row.get(spec.column)
+    if value is None:
+        return None
+    if spec.bins is None:
+        return str(value)
+    idx = bisect_left(spec.bins, float(value)) - 1
+    labels = spec.labels or [f"{lo}-{hi}" for lo, hi in zip(spec.bins[:-1], spec.bins[1:])]
+    return labels[idx] if 0 <= idx < len(labels) else None
+
+
+class StreamAggregator:
+    """Overall and per-group statistics of one or more delay columns (one
+    per history window) over rows added one at a time."""
+
+    def __init__(self, delays=("DelayOneMonth",), specs=STREAM_SPECS, relative_accuracy=0.02):
+        self.delays = list(delays)
+        self.specs = specs
+        self.relative_accuracy = relative_accuracy
+        self.overall = {delay: GroupState(relative_accuracy) for delay in self.delays}
+        self.groups = {delay: {spec.name: {} for spec in specs} for delay in self.delays}
+        self.rows = 0
+
+    def add(self, row):
+        self.rows += 1
+        labels = [(spec.name, group_label(spec, row)) for spec in self.specs]
+        for delay in self.delays:
+            value = row.get(delay)
+            if value is None or not math.isfinite(value):
+                continue
+            self.overall[delay].add(value)
+            for name, label in labels:
+                if label is not None:
+                    groups = self.groups[delay][name]
+                    if label not in groups:
+                        groups[label] = GroupState(self.relative_accuracy)
+                    groups[label].add(value)
+
+    def merge(self, other):
+        self.rows += other.rows
+        for delay in other.delays:
+            if delay not in self.overall:
+                self.delays.append(delay)
+                self.overall[delay] = GroupState(self.relative_accuracy)
+                self.groups[delay] = {}
+            self.overall[delay].merge(other.overall[delay])
+            for name, groups in other.groups[delay].items():
+                mine = self.groups[delay].setdefault(name, {})
+                for label, state in groups.items():
+                    mine.setdefault(label, GroupState(self.relative_accuracy)).merge(state)
+        return self
+
+    def snapshot(self, finished=False):
+        return {
+            "updated_at": time.time(),
+            "finished": finished,
+            "rows": self.rows,
+            "delays": {
+                delay: {
+                    "overall": self.overall[delay].summary(),
+                    "groups": {name: {label: state.summary() for label, state in groups.items()}
+                               for name, groups in self.groups[delay].items()},
+                }
+                for delay in self.delays
+            },
+        }
+
+
+def publish(snapshot, path=LIVE_FILE):
+    """Write a snapshot so readers only ever see a complete file."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path=LIVE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+async def consume(queue, aggregator, path=LIVE_FILE, interval=2.0):
+    """Feed rows (dicts) from `queue` into `aggregator` until a None arrives,
+    publishing a snapshot at most every `interval` seconds and once at the end."""
+    published = time.monotonic()
+    while True:
+        row = await queue.get()
+        if row is None:
+            break
+        aggregator.add(row)
+        if time.monotonic() - published >= interval:
+            publish(aggregator.snapshot(), path)
+            published = time.monotonic()
+    publish(aggregator.snapshot(finished=True), path)
+    return aggregator
@@ -0,0 +1,61 @@
+import argparse
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scraper import page_filename
+
+
+# Replays pages saved with `scraper.py --save-pages DIR`, standing in for both
+# etrain.info and erail.in (their paths don't overlap)
+def make_handler(directory, latency=0.0):
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            path = os.path.join(directory, page_filename(self.path))
+            if not os.path.exists(path):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def serve(directory, port=0, latency=0.0):
+    """Start the stub server on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(directory, latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve saved etrain/erail pages locally")
+    parser.add_argument("directory")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.directory, args.latency))
+    print(f"Serving {args.directory} on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
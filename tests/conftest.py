@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root and aren't installed
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+TRAINS = 20
+PER_PAGE = 10
+
+
+@pytest.fixture(scope="session")
+def pages_dir(tmp_path_factory):
+    """Synthetic etrain/erail pages for TRAINS trains, one and three month histories."""
+    from benchmarks.synthetic import make_pages
+
+    directory = str(tmp_path_factory.mktemp("pages"))
+    make_pages(directory, TRAINS, timelines=("1m", "3m"), per_page=PER_PAGE, days=10, links=5)
+    return directory
+
+
+@pytest.fixture(scope="session")
+def pages(pages_dir):
+    from benchmarks.parse_bench import load_pages
+
+    return load_pages(pages_dir)
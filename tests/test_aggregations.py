@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregations import BY_DISTANCE, BY_TYPE, BY_ZONE, aggregate
+from benchmarks.synthetic import make_dataset
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = make_dataset(2000, seed=1)
+    df.loc[::50, "DelayOneMonth"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("spec", [BY_TYPE, BY_ZONE])
+def test_aggregate_matches_groupby(data, spec):
+    result = aggregate(data, [spec])[spec.name]
+    grouped = data.dropna(subset=["DelayOneMonth"]).groupby(spec.column)["DelayOneMonth"]
+    expected = pd.DataFrame({"count": grouped.count(), "mean": grouped.mean(), "median": grouped.median(),
+                             "q25": grouped.quantile(0.25), "q75": grouped.quantile(0.75)})
+    pd.testing.assert_frame_equal(result[expected.columns].sort_index(), expected.sort_index(),
+                                  check_dtype=False, check_names=False)
+
+
+def test_binned_spec_is_right_closed(data):
+    result = aggregate(data, [BY_DISTANCE])[BY_DISTANCE.name]
+    valid = data.dropna(subset=["DelayOneMonth"])
+    bands = pd.cut(valid["MaxDistance"], list(BY_DISTANCE.bins), labels=list(BY_DISTANCE.labels))
+    expected = valid.groupby(bands, observed=True)["DelayOneMonth"].mean()
+    np.testing.assert_allclose(result["mean"].loc[expected.index.astype(str)], expected)
+
+
+def test_bucket_shares_sum_to_one(data):
+    result = aggregate(data, [BY_TYPE])[BY_TYPE.name]
+    shares = result[[c for c in result.columns if c.startswith("share")]]
+    np.testing.assert_allclose(shares.sum(axis=1), 1)
@@ -0,0 +1,52 @@
+import sys
+
+import pandas as pd
+
+import scraper
+from checkpoint import CheckpointStore
+from stub_server import serve
+from tests.conftest import TRAINS
+
+
+def test_resume_skips_done_and_retries_failed(tmp_path):
+    store = CheckpointStore(str(tmp_path / "c.db"))
+    store.mark_done("1", "1m", "A", ["row", 10])
+    store.mark_failed("2", "1m", "B", "timeout")
+    for _ in range(3):
+        store.mark_failed("3", "1m", "C", "timeout")
+
+    assert store.done() == {"1"}
+    assert store.retry_queue(max_attempts=3) == [["B", "2"]]
+    assert store.exhausted(max_attempts=3) == {"3"}
+    assert store.row("1") == ["row", 10] and store.row("2") is None
+
+
+def test_failed_refresh_keeps_row(tmp_path):
+    store = CheckpointStore(str(tmp_path / "c.db"))
+    store.mark_done("1", "1m", "A", ["row", 10])
+    store.mark_refresh_failed("1", "1m", "http_404")
+
+    assert store.row("1") == ["row", 10]
+    assert store.counts() == {"done": 1}
+    assert store.retry_queue() == [["A", "1"]] and store.done() == set()
+    store.mark_done("1", "1m", "A", ["row", 10])
+    assert store.retry_queue() == [] and store.done() == {"1"}
+
+
+def _scrape(monkeypatch, url, tmp_path, *extra):
+    monkeypatch.setattr(sys, "argv", [
+        "scraper.py", "--pages", "2", "--output", str(tmp_path / "out.csv"), "--checkpoint", str(tmp_path / "c.db"),
+        "--host-rate", "0", "--etrain-url", url, "--erail-url", url, "--no-render",
+        "--metrics", str(tmp_path / "metrics.json"), *extra])
+    scraper.main()
+
+
+def test_scrape_resume(pages_dir, tmp_path, monkeypatch, capsys):
+    _, url = serve(pages_dir)
+    _scrape(monkeypatch, url, tmp_path)
+    first = pd.read_csv(tmp_path / "out.csv")
+    assert len(first) == TRAINS
+
+    _scrape(monkeypatch, url, tmp_path, "--resume")
+    assert f"Resuming: {TRAINS} trains skipped, 0 queued for retry" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "out.csv"), first)
@@ -0,0 +1,47 @@
+import sys
+import threading
+
+import numpy as np
+
+import dataset
+from benchmarks.synthetic import make_dataset
+
+
+def test_csv_bundle_csv_round_trip(tmp_path, monkeypatch):
+    df = make_dataset(300, seed=2)
+    # "NA" is a station code, not a missing value; an empty delay is missing
+    df.loc[0, "Origin"] = "NA"
+    df.loc[1, "Destination"] = "NA"
+    df.loc[2, "DelayOneMonth"] = np.nan
+    df.loc[3, "DelayOneMonth"] = 0.1 + 0.2
+    csv = tmp_path / "train_data.csv"
+    df.to_csv(csv, index=False)
+
+    dataset.build_bundle(str(csv))
+    monkeypatch.setattr(sys, "argv", ["dataset.py", str(csv), "--to-csv", str(tmp_path / "back.csv")])
+    dataset.main()
+    assert (tmp_path / "back.csv").read_bytes() == csv.read_bytes()
+
+
+def test_resave_keeps_only_the_manifest_generation(tmp_path):
+    df = make_dataset(50, seed=3)
+    path = str(tmp_path / "b.bundle")
+    dataset.save_bundle(df, path)
+    dataset.save_bundle(df.iloc[:20], path)
+
+    generation = dataset.read_manifest(path)["generation"]
+    files = [name for name in (tmp_path / "b.bundle").iterdir() if name.suffix == ".npy"]
+    assert files and all(f".{generation}." in name.name for name in files)
+    assert len(dataset.load_bundle(path)) == 20
+
+
+def test_saves_wait_for_the_bundle_lock(tmp_path):
+    path = tmp_path / "b.bundle"
+    path.mkdir()
+    writer = threading.Thread(target=dataset.save_bundle, args=(make_dataset(10), str(path)))
+    with dataset._locked(str(path)):
+        writer.start()
+        writer.join(0.3)
+        assert writer.is_alive() and not (path / dataset.MANIFEST).exists()
+    writer.join()
+    assert len(dataset.load_bundle(str(path))) == 10
@@ -0,0 +1,56 @@
+import numpy as np
+
+from distribution import binned_pdf, kde, pdf_fit, silverman_bandwidth
+
+
+def _notebook_pdf(values, deltaX=4, starting=0, ending=310):
+    # The notebook's original two-pointer loop
+    delayArray = np.sort(np.asarray(values, dtype=np.float64))
+    ptr1, pdf, edges = 0, [], []
+    while ptr1 < len(delayArray) and starting <= ending:
+        ptr2, count = ptr1, 0
+        while ptr2 < len(delayArray) and delayArray[ptr2] <= starting + deltaX:
+            count += 1
+            ptr2 += 1
+        pdf.append(count / len(delayArray) / deltaX)
+        edges.append(starting)
+        starting += deltaX
+        ptr1 = ptr2
+    return np.array(edges), np.array(pdf)
+
+
+def test_binned_pdf_matches_notebook_loop():
+    rng = np.random.default_rng(0)
+    for values in (rng.exponential(20, 500).round(), rng.uniform(0, 400, 500).round(), [0.0, 4.0, 12.0], []):
+        x, pdf = binned_pdf(values)
+        expected_x, expected_pdf = _notebook_pdf(values)
+        np.testing.assert_array_equal(x, expected_x)
+        np.testing.assert_allclose(pdf, expected_pdf)
+
+
+def test_pdf_fit_smooths_and_fits_the_binned_pdf():
+    values = np.random.default_rng(1).gamma(2, 20, 3000)
+    pdf, polynomial, score = pdf_fit(values)
+    x, raw = binned_pdf(values, width=3)
+    np.testing.assert_array_equal(pdf["Delay"], x)
+    np.testing.assert_allclose(pdf["PDF"], raw)
+    assert polynomial.order == 5 and 0.9 < score <= 1
+
+    pdf, polynomial, score = pdf_fit([5.0, 7.0])
+    assert len(pdf) == 3 and polynomial is None and np.isnan(score)
+
+
+def test_kde_density_matches_grid():
+    values = np.random.default_rng(2).normal(40, 15, 2000)
+    grid, density = kde(values)
+    assert len(density) == len(grid) == 512
+    assert abs(density.sum() * (grid[1] - grid[0]) - 1) < 0.01
+    bandwidth = silverman_bandwidth(values)
+    exact = np.exp(-0.5 * ((grid[256] - values) / bandwidth) ** 2).sum() / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+    assert abs(density[256] - exact) < 0.01 * exact
+
+    for values in ([0.0] * 50, [12.0], [5.0, 5.5]):
+        grid, density = kde(values)
+        assert len(density) == len(grid) and abs(density.sum() * (grid[1] - grid[0]) - 1) < 0.01
+    grid, density = kde([])
+    assert len(grid) == len(density) == 0
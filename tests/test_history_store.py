@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+import parsers
+from history_store import HistoryStore
+from tests.conftest import fixture
+
+
+def _records(days, end=date(2024, 6, 30)):
+    return [(station, end - timedelta(days=d), d % 40) for d in range(days) for station in ("NDLS", "CNB")]
+
+
+def test_longer_window_fills_older_days(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    assert store.append("12301", _records(30)) == 60
+    assert store.append("12301", _records(90)) == 120
+    assert store.append("12301", _records(90)) == 0
+    assert len(store.observations("12301")) == 180
+    assert store.last_day("12301") == (date(2024, 6, 30) - date(1970, 1, 1)).days
+
+
+def test_rollups_match_observations(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append("1", _records(10))
+    store.append("2", _records(5))
+    hotspots = store.station_hotspots(min_observations=1)
+    assert hotspots["observations"].sum() == 30
+    obs = store.observations("1")
+    assert store.station_hotspots(min_observations=1, trainNo="1").loc["CNB", "mean_delay"] == \
+        obs[obs["station"] == "CNB"]["delay"].mean()
+
+
+def test_history_detail():
+    records = parsers.parse_history_detail(fixture("etrain_history_12301_1m.html"), year=2024)
+    assert len(records) == 8 * 5
+    assert {day for _, day, _ in records} == {date(2024, 5, 30) + timedelta(days=d) for d in range(5)}
+    assert ("NDLS", date(2024, 6, 1), 68) in records
+    assert ("CNB", date(2024, 5, 30), -5) in records
+
+
+def test_yearless_date_after_today_is_last_year():
+    assert parsers._parse_date("30 Dec", 2026, today=date(2026, 1, 2)) == date(2025, 12, 30)
+    assert parsers._parse_date("1 Jan", 2026, today=date(2026, 1, 2)) == date(2026, 1, 1)
+    assert parsers._parse_date("30 Dec", 2026) == date(2026, 12, 30)
+
+
+def test_leap_day():
+    assert parsers._parse_date("29 Feb", 2024) == date(2024, 2, 29)
+    assert parsers._parse_date("29-Feb", 2024) == date(2024, 2, 29)
+    assert parsers._parse_date("29 Feb", 2023) is None
+    # Inferred year: a 29 Feb seen in 2025 can only be from 2024
+    assert parsers._parse_date("29 Feb", 2025, today=date(2025, 3, 5)) == date(2024, 2, 29)
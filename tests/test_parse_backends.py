@@ -0,0 +1,24 @@
+import pytest
+
+import parsers
+from parse_backends import BACKENDS, parse_page
+from tests.conftest import PER_PAGE, TRAINS
+
+
+def test_listing_pages(pages):
+    entries = [parsers.parse_listing_page(html) for html in pages["listing"]]
+    assert [len(e) for e in entries] == [PER_PAGE] * (TRAINS // PER_PAGE)
+    assert entries[0][0] == ["Synthetic-Express-10000", "10000"]
+
+
+def test_history_pages(pages):
+    for html in pages["history"]:
+        delay = parsers.parse_history_page(html)
+        assert delay is not None and delay >= 0
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+@pytest.mark.parametrize("kind", ["listing", "history", "route"])
+def test_backends_agree_with_bs4(pages, backend, kind):
+    for html in pages[kind]:
+        assert parse_page(backend, kind, html) == parse_page("bs4", kind, html)
@@ -0,0 +1,63 @@
+import asyncio
+import shutil
+
+import pytest
+
+import parsers
+import scraper
+from parse_backends import BACKENDS, parse_page
+from schema import station_codes
+from stub_server import serve
+from tests.conftest import FIXTURES, fixture
+
+ROUTE_PAGE = "erail_train_enquiry_12301.html"
+HISTORY_PAGE = "etrain_history_12301_1m.html"
+
+ROUTE_STOPS = [
+    ["HWH", "ER", "HWH", 0], ["ASN", "ER", "ASN", 200], ["DHN", "ECR", "DHN", 259], ["GAYA", "ECR", None, 458],
+    ["DDU", "ECR", "DDU", 661], ["PRYJ", "NCR", "PRYJ", 814], ["CNB", "NCR", "PRYJ", 1007],
+    ["NDLS", "NR", "DLI", 1451],
+]
+
+
+def test_route_page():
+    row, stops = parsers.parse_route(fixture(ROUTE_PAGE))
+    assert row[:7] == ["HWH", "NDLS", 8, 1451, "GRB", "ER", "NR"]
+    # GAYA's title has no division, so it counts as a stop but in no division
+    divisions = {code: n for code, n in zip(station_codes, row[7:]) if n}
+    assert divisions == {"HWH": 1, "ASN": 1, "DHN": 1, "DDU": 1, "PRYJ": 2, "DLI": 1}
+    assert stops == ROUTE_STOPS
+
+
+def test_route_page_without_table():
+    assert parsers.parse_route("<html><body><p>Loading...</p></body></html>") == (None, [])
+
+
+def test_history_page():
+    html = fixture(HISTORY_PAGE)
+    # Right Time counts as 0 and, by default, the early -4 at CNB too
+    assert parsers.parse_history_page(html) == 134 / 8
+    assert parsers.parse_history_page(html, early="keep") == 130 / 8
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_backends_agree_on_saved_pages(backend):
+    for kind, name in [("route", ROUTE_PAGE), ("history", HISTORY_PAGE)]:
+        html = fixture(name)
+        assert parse_page(backend, kind, html) == parse_page("bs4", kind, html)
+
+
+def test_route_fast_path_needs_no_rendering(tmp_path):
+    shutil.copy(f"{FIXTURES}/{ROUTE_PAGE}", tmp_path / scraper.page_filename("/train-enquiry/12301"))
+    _, url = serve(str(tmp_path))
+
+    async def run():
+        engine = scraper.ScrapeEngine(url, url, host_rate=0, render_fallback=False)
+        try:
+            return await engine.get_train_meta("12301"), engine.stats
+        finally:
+            await engine.close()
+
+    row, stats = asyncio.run(run())
+    assert row[:4] == ["HWH", "NDLS", 8, 1451]
+    assert stats["meta_static"] == 1 and stats["meta_rendered"] == 0
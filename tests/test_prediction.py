@@ -0,0 +1,16 @@
+import numpy as np
+
+from benchmarks.synthetic import make_dataset
+from prediction import DelayModel, PredictionService
+
+
+def test_known_trains_are_predicted_once_up_front():
+    data = make_dataset(500, seed=4)
+    data["TrainNo"] = [str(12000 + i) for i in range(len(data))]
+    model = DelayModel().fit(data)
+    service = PredictionService(model, data)
+
+    predicted = service.predict_trains([12003, "12010", "99999"])
+    assert list(predicted) == ["12003", "12010"]
+    np.testing.assert_allclose(list(predicted.values()), model.predict(data.iloc[[3, 10]]), rtol=1e-6)
+    assert PredictionService(model).predict_trains(["12003"]) == {}
@@ -0,0 +1,74 @@
+import asyncio
+
+import requests
+
+import scraper
+from stub_server import serve
+from tests.conftest import PER_PAGE, TRAINS
+
+
+def _run(url, pages, results, patch=None):
+    async def run():
+        engine = scraper.ScrapeEngine(url, url, host_rate=0, render_fallback=False)
+        if patch is not None:
+            patch(engine)
+        try:
+            return await engine.run(pages, lambda name, no, row, error: results.setdefault(no, row))
+        finally:
+            await engine.close()
+
+    return asyncio.run(run())
+
+
+def test_engine_against_stub(pages_dir):
+    _, url = serve(pages_dir)
+    results = {}
+    stats = _run(url, [1, 2], results)
+    assert stats["ok"] == stats["trains"] == len(results) == TRAINS
+    assert all(row[-1] is not None for row in results.values())
+
+
+def test_failed_listing_page_does_not_abort_run(pages_dir):
+    _, url = serve(pages_dir)
+    results = {}
+
+    def patch(engine):
+        fetch, parse = engine.fetch, engine.parse
+
+        async def flaky_fetch(page_url, stage="fetch"):
+            if page_url.endswith("page=2"):
+                raise requests.ConnectionError("connection reset")
+            if page_url.endswith("page=3"):
+                return "<unexpected markup>"
+            return await fetch(page_url, stage)
+
+        async def strict_parse(kind, html, **options):
+            if html == "<unexpected markup>":
+                raise ValueError("no listing table")
+            return await parse(kind, html, **options)
+
+        engine.fetch, engine.parse = flaky_fetch, strict_parse
+
+    stats = _run(url, [1, 2, 3, 404], results, patch)
+    assert stats["listing_errors"] == 3
+    assert stats["ok"] == stats["trains"] == len(results) == PER_PAGE
+
+
+def test_connection_pool_holds_every_request_in_flight(pages_dir, caplog):
+    _, url = serve(pages_dir)
+    results = {}
+
+    async def run():
+        engine = scraper.ScrapeEngine(url, url, concurrency=4, host_rate=0, render_fallback=False,
+                                      timelines=["1m", "3m"])
+        try:
+            await engine.run([1, 2], lambda name, no, row, error: results.setdefault(no, row))
+            return engine
+        finally:
+            await engine.close()
+
+    engine = asyncio.run(run())
+    adapter = next(iter(engine.sessions.values())).get_adapter(url)
+    assert adapter._pool_maxsize == engine.fetch_workers == 12
+    assert len(results) == TRAINS
+    assert "Connection pool is full" not in caplog.text
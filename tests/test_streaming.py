@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from streaming import QuantileSketch, StreamAggregator
+
+
+def _sketch(values):
+    sketch = QuantileSketch(0.02)
+    for x in values:
+        sketch.add(x)
+    return sketch
+
+
+@pytest.mark.parametrize("q", [0.05, 0.25, 0.5, 0.75, 0.9])
+def test_sketch_accuracy_with_early_arrivals(q):
+    values = np.random.default_rng(0).normal(10, 30, 5000)
+    truth = np.quantile(values, q, method="lower")
+    estimate = _sketch(values).quantile(q)
+    assert abs(estimate - truth) <= 0.02 * abs(truth) + 0.5
+
+
+def test_sketch_merge_matches_single_pass():
+    values = np.random.default_rng(1).normal(0, 40, 2000)
+    merged = _sketch(values[:700]).merge(_sketch(values[700:]))
+    whole = _sketch(values)
+    assert [merged.quantile(q) for q in (0.1, 0.5, 0.9)] == [whole.quantile(q) for q in (0.1, 0.5, 0.9)]
+
+
+def test_aggregator_keeps_horizons_apart():
+    live = StreamAggregator(["DelayOneMonth", "DelayThreeMonth"])
+    live.add({"TrainType": "SF", "DelayOneMonth": 10.0, "DelayThreeMonth": -5.0})
+    live.add({"TrainType": "SF", "DelayOneMonth": 20.0, "DelayThreeMonth": None})
+    snapshot = live.snapshot()
+    assert snapshot["rows"] == 2
+    assert snapshot["delays"]["DelayOneMonth"]["overall"]["count"] == 2
+    three = snapshot["delays"]["DelayThreeMonth"]
+    assert three["overall"]["count"] == 1 and three["overall"]["min"] == -5.0
+    assert three["groups"]["by_type"]["SF"]["median"] < 0
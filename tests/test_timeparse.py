@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from parsers import average_delay
+from timeparse import clock_minutes, delay_minutes, elapsed_minutes, time_difference
+
+TEXTS = ["Avg. Delay: 25 Min's", "-5 M", "1 H 20 M", "15", "Right Time", "5 min early", "garbage", None]
+
+
+def test_delay_minutes_keep():
+    np.testing.assert_array_equal(delay_minutes(TEXTS), [25, -5, 80, 15, 0, -5, np.nan, np.nan])
+
+
+def test_delay_minutes_early_policies():
+    np.testing.assert_array_equal(delay_minutes(TEXTS, "zero")[:6], [25, 0, 80, 15, 0, 0])
+    np.testing.assert_array_equal(delay_minutes(TEXTS, "drop")[:6], [25, np.nan, 80, 15, 0, np.nan])
+    with pytest.raises(ValueError):
+        delay_minutes(TEXTS, "clamp")
+
+
+def test_clock_minutes():
+    np.testing.assert_array_equal(clock_minutes(["23.50", "00:10", "24.00", "7.5", "08:15:00"]),
+                                  [1430, 10, np.nan, np.nan, 495])
+
+
+def test_time_difference_wraps_midnight():
+    np.testing.assert_array_equal(time_difference(["23.50", "10.00"], ["00.10", "09.00"]), [20, 1380])
+    np.testing.assert_array_equal(time_difference(["23.50"], ["00.10"], days=[1]), [20])
+
+
+def test_elapsed_minutes_rolls_over():
+    np.testing.assert_array_equal(elapsed_minutes(["22.00", "23.30", "x", "01.15", "04.00"]),
+                                  [0, 90, np.nan, 195, 360])
+
+
+def test_average_delay_early_policy():
+    texts = ["Avg. Delay: 30 Min's", "Avg. Delay: -10 Min's"]
+    assert average_delay(texts) == 15
+    assert average_delay(texts, early="keep") == 10
+    assert average_delay(texts, early="drop") == 30
+    assert average_delay([]) is None
@@ -0,0 +1,111 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Schedule times and delays as they appear on etrain/erail pages, parsed a
+# whole column at a time. History pages repeat the same few hundred texts
+# ("Avg. Delay: 25 Min's", "Right Time", ...) over and over, so a column is
+# factorized first, each distinct text is parsed once, and the results are
+# spread back with NumPy indexing: the per-value cost is a hash lookup
+# rather than a strptime/int(). Everything returns float arrays of minutes
+# with NaN where a value is malformed, so callers decide what to drop.
+#
+# Delays are late-positive. What happens to early arrivals (negative delays)
+# is a policy, as the notebook clamped them to zero:
+#
+#   "keep"   leave them negative
+#   "zero"   count them as on time (the notebook's max(0, delay))
+#   "drop"   treat them as missing
+
+EARLY_POLICIES = ("keep", "zero", "drop")
+MINUTES_PER_DAY = 24 * 60
+
+CLOCK_RE = re.compile(r"\s*(\d{1,2})[.:](\d{2})(?::\d{2})?\s*")
+HOURS_RE = re.compile(r"(\d+)\s*h", re.I)
+MINUTES_RE = re.compile(r"(\d+)\s*m", re.I)
+PLAIN_RE = re.compile(r"\D*?(\d+)\s*")
+NEGATIVE_RE = re.compile(r"^[^\d-]*-|\bearly\b", re.I)
+RIGHT_TIME_RE = re.compile(r"right\s*time|^\s*rt\s*$|on\s*time", re.I)
+
+
+def _by_value(values, parse):
+    # parse() once per distinct value; None/NaN stay NaN
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object).ravel())
+    parsed = np.array([parse(str(u)) for u in uniques] + [np.nan], dtype=np.float64)
+    return parsed[codes]
+
+
+def _clock(text):
+    match = CLOCK_RE.fullmatch(text)
+    if not match:
+        return np.nan
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    return hours * 60 + minutes if hours < 24 and minutes < 60 else np.nan
+
+
+def _delay(text):
+    if RIGHT_TIME_RE.search(text):
+        return 0.0
+    hours, minutes = HOURS_RE.search(text), MINUTES_RE.search(text)
+    if hours or minutes:
+        total = (int(hours.group(1)) * 60 if hours else 0) + (int(minutes.group(1)) if minutes else 0)
+    else:
+        plain = PLAIN_RE.fullmatch(text)
+        if not plain:
+            return np.nan
+        total = int(plain.group(1))
+    return -total if NEGATIVE_RE.search(text) else total
+
+
+def clock_minutes(values):
+    """Minutes since midnight of "HH.MM" / "HH:MM" times; NaN if malformed."""
+    return _by_value(values, _clock)
+
+
+def _minutes(values):
+    values = np.asarray(values)
+    if values.dtype.kind in "iuf":
+        return values.astype(np.float64)
+    return clock_minutes(values)
+
+
+def time_difference(start, end, days=None):
+    """Minutes from `start` to `end` (clock strings or minutes since midnight).
+    Without `days`, an end earlier than the start is taken to be on the next
+    day; `days` gives the number of midnights crossed explicitly."""
+    diff = _minutes(end) - _minutes(start)
+    if days is None:
+        return np.mod(diff, MINUTES_PER_DAY)
+    return diff + MINUTES_PER_DAY * np.asarray(days, dtype=np.float64)
+
+
+def elapsed_minutes(times):
+    """Minutes since the first of a train's successive clock times, adding a
+    day every time the clock goes backwards. Malformed times stay NaN and
+    don't count as a rollover."""
+    clock = _minutes(times)
+    valid = np.isfinite(clock)
+    if not valid.any():
+        return clock
+    days = np.zeros(len(clock))
+    days[valid] = np.concatenate([[0], np.cumsum(np.diff(clock[valid]) < 0)])
+    return clock + MINUTES_PER_DAY * days - clock[valid][0]
+
+
+def apply_early(delays, early="keep"):
+    if early not in EARLY_POLICIES:
+        raise ValueError(f"unknown early arrival policy {early!r}, expected one of {', '.join(EARLY_POLICIES)}")
+    delays = np.asarray(delays, dtype=np.float64)
+    if early == "zero":
+        return np.where(delays < 0, 0.0, delays)
+    if early == "drop":
+        return np.where(delays < 0, np.nan, delays)
+    return delays
+
+
+def delay_minutes(values, early="keep"):
+    """Delays in minutes from texts like "Avg. Delay: 25 Min's", "1 H 20 M",
+    "-5 M", "15" or "Right Time"; NaN for anything else. A leading minus or
+    the word "early" makes a delay negative, which `early` then handles."""
+    return apply_early(_by_value(values, _delay), early)